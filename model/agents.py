@@ -11,7 +11,7 @@ Uses Pydantic AI + Gemini 2.0 Flash for structured output generation.
 
 
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 from pydantic_ai import Agent
 from pydantic_ai.exceptions import ModelRetry
 from typing import Literal
@@ -19,6 +19,8 @@ from typing import Literal
 from typing import Union
 from uuid import uuid4
 
+from response_cache import cache_key, get_response_cache
+
 # ============================================================================
 # Pydantic Schemas
 # ============================================================================
@@ -49,13 +51,8 @@ class Microtask(BaseModel):
 # Generator Agent
 # ============================================================================
 
-generator = Agent[
-    None,  # No dependencies
-    Microtask
-](
-    model='google-vertex:gemini-2.0-flash-exp',  # Using Vertex AI with Gemini 2.0 Flash
-    output_type=Microtask,
-    system_prompt='''
+GENERATOR_MODEL = 'google-vertex:gemini-2.0-flash-exp'  # Using Vertex AI with Gemini 2.0 Flash
+GENERATOR_SYSTEM_PROMPT = '''
                 You are a RIASEC microtask generator for university program profiling for HIGH SCHOOL STUDENTS (ages 16-17).
 
                 TARGET AUDIENCE: 16-17 year old students choosing university programs. Use language and scenarios they can relate to.
@@ -86,6 +83,14 @@ generator = Agent[
                 - "Managing corporate databases" ✗
                 - "Coordinating project timelines in industry" ✗
                 '''
+
+generator = Agent[
+    None,  # No dependencies
+    Microtask
+](
+    model=GENERATOR_MODEL,
+    output_type=Microtask,
+    system_prompt=GENERATOR_SYSTEM_PROMPT
 )
 
 
@@ -110,22 +115,28 @@ def validate_task_quality(ctx, output: Microtask) -> Microtask:
 # Generation Function
 # ============================================================================
 
-def generate_microtask(
+def _model_name(model, default: str) -> str:
+    """Name of a model override (string or pydantic_ai Model) for cache keys."""
+    if model is None:
+        return default
+    if isinstance(model, str):
+        return model
+    return f"{type(model).__name__}:{getattr(model, 'model_name', '')}"
+
+
+def microtask_cache_key(prompt: str, model=None) -> str:
+    """Response cache key for a rendered microtask prompt."""
+    return cache_key(
+        _model_name(model, GENERATOR_MODEL), GENERATOR_SYSTEM_PROMPT, prompt, Microtask.model_json_schema()
+    )
+
+
+def build_microtask_prompt(
     program: str,
     policy: str,
     target_axes: list[str] | None = None
-) -> dict:
-    """
-    Generate single microtask. Returns dict matching microtasks.json format.
-    
-    Args:
-        program: Program name (e.g., "Mathematics")
-        policy: "broad" or single axis ("R", "I", "A", "S", "E", "C")
-        target_axes: For disambiguate_top2, the [top1, top2] axes to include in options
-    
-    Returns:
-        dict: Microtask with 'question' and 'options' fields
-    """
+) -> str:
+    """Prompt for generate_microtask / generate_microtask_async."""
     # Build prompt based on policy
     if target_axes and len(target_axes) == 2:
         # Disambiguate top-2: options MUST include both axes
@@ -164,19 +175,52 @@ def generate_microtask(
                     - "Leading study groups on [program topic]" (Enterprising)
                     - "Build/use [program-specific tools]" (Realistic)
                     - "Research [program-specific theories]" (Investigative)"""
-    
-    # Generate task
-    result = generator.run_sync(prompt)
-    task = result.output.model_dump()
-    
-    # Validate: For disambiguate_top2, ensure both target axes are present
+    return prompt
+
+
+def check_target_axes(task: dict, target_axes: list[str] | None = None) -> dict:
+    """For disambiguate_top2, ensure both target axes are present in the options."""
     if target_axes and len(target_axes) == 2:
         option_axes = [opt["riasec"] for opt in task["options"].values()]
         if target_axes[0] not in option_axes or target_axes[1] not in option_axes:
             raise ValueError(
                 f"Generated task missing required axes {target_axes}. Got: {option_axes}"
             )
+    return task
+
+
+def generate_microtask(
+    program: str,
+    policy: str,
+    target_axes: list[str] | None = None,
+    use_cache: bool = False
+) -> dict:
+    """
+    Generate single microtask. Returns dict matching microtasks.json format.
+    
+    Args:
+        program: Program name (e.g., "Mathematics")
+        policy: "broad" or single axis ("R", "I", "A", "S", "E", "C")
+        target_axes: For disambiguate_top2, the [top1, top2] axes to include in options
+        use_cache: Serve identical prompts from the on-disk response cache
+            (default off: every call should yield a new task; turn on to rebuild
+            a bank from prompts answered before)
+    
+    Returns:
+        dict: Microtask with 'question' and 'options' fields
+    """
+    prompt = build_microtask_prompt(program, policy, target_axes)
+    cache = get_response_cache() if use_cache else None
+    key = microtask_cache_key(prompt)
+    if cache is not None and (task := cache.get(key)) is not None:
+        return task
     
+    # Generate task
+    result = generator.run_sync(prompt)
+    task = check_target_axes(result.output.model_dump(), target_axes)
+    
+    if cache is not None:
+        cache.put(key, task)
     return task
 
 
@@ -242,13 +286,8 @@ AptitudeTask = Union[PuzzleTask, ClassifyTask, CodeOrderTask, FillBlankTask, Gra
 
 
 
-aptitude_generator = Agent[
-    None,
-    AptitudeTask
-](
-    model="google-vertex:gemini-2.0-flash-exp",
-    output_type=AptitudeTask,
-    system_prompt="""
+APTITUDE_MODEL = "google-vertex:gemini-2.0-flash-exp"
+APTITUDE_SYSTEM_PROMPT = """
         You generate aptitude micro challenges for high school students for a playful study choice tool.
         The question should feel like a first step in a real course task.
         who are exploring different bachelor programmes.
@@ -287,7 +326,15 @@ aptitude_generator = Agent[
 
         Never ask what students prefer or enjoy.
         Use imperative instructions such as choose, select, arrange.
-    """,
+    """
+
+aptitude_generator = Agent[
+    None,
+    AptitudeTask
+](
+    model=APTITUDE_MODEL,
+    output_type=AptitudeTask,
+    system_prompt=APTITUDE_SYSTEM_PROMPT,
 )
 
 @aptitude_generator.output_validator
@@ -369,18 +416,8 @@ def validate_aptitude_task(ctx, output: AptitudeTask) -> AptitudeTask:
     return output
 
 
-def generate_aptitude_task(program: str, task_type: TaskType) -> dict:
-    """
-    Generate one aptitude micro challenge for a programme.
-
-    Args:
-        program: programme name, for example Archaeology.
-        task_type: one of puzzle, classify, codeorder, fillblank, graph.
-
-    Returns:
-        dict with the same shape as aptitude entries in microtasks_bank.json,
-        plus signalType and question_code fields so it can be appended to the bank.
-    """
+def build_aptitude_prompt(program: str, task_type: TaskType) -> str:
+    """Prompt for generate_aptitude_task / generate_aptitude_task_async."""
     type_specific = {
         "puzzle": """
             Create a short logic or pattern puzzle that could plausibly
@@ -438,16 +475,50 @@ def generate_aptitude_task(program: str, task_type: TaskType) -> dict:
         Use clear and concise wording.
     """
 
-    prompt = base_prompt + type_specific[task_type]
+    return base_prompt + type_specific[task_type]
+
+
+def aptitude_cache_key(prompt: str, model=None) -> str:
+    """Response cache key for a rendered aptitude prompt."""
+    return cache_key(
+        _model_name(model, APTITUDE_MODEL), APTITUDE_SYSTEM_PROMPT, prompt, TypeAdapter(AptitudeTask).json_schema()
+    )
 
-    result = aptitude_generator.run_sync(prompt)
-    task_dict = result.output.model_dump()
 
-    # Here we attach envelope fields used in the bank
+def aptitude_envelope(task_dict: dict, program: str, task_type: TaskType) -> dict:
+    """Attach the envelope fields used in the bank."""
     task_dict["signalType"] = "aptitude"
     task_dict["program"] = program
     task_dict["question_code"] = f"{program[:3].lower()}-{task_type}-{uuid4().hex[:6]}"
+    return task_dict
+
+
+def generate_aptitude_task(program: str, task_type: TaskType, use_cache: bool = False) -> dict:
+    """
+    Generate one aptitude micro challenge for a programme.
 
+    Args:
+        program: programme name, for example Archaeology.
+        task_type: one of puzzle, classify, codeorder, fillblank, graph.
+        use_cache: serve identical prompts from the on-disk response cache
+            (default off, so repeated calls give new challenges).
+
+    Returns:
+        dict with the same shape as aptitude entries in microtasks_bank.json,
+        plus signalType and question_code fields so it can be appended to the bank.
+    """
+    prompt = build_aptitude_prompt(program, task_type)
+    cache = get_response_cache() if use_cache else None
+    key = aptitude_cache_key(prompt)
+    if cache is not None and (task_dict := cache.get(key)) is not None:
+        return task_dict
+
+    result = aptitude_generator.run_sync(prompt)
+    task_dict = aptitude_envelope(result.output.model_dump(), program, task_type)
+
+    # Here we cache the envelope too, so a re-run keeps the same question_code
+    if cache is not None:
+        cache.put(key, task_dict)
     return task_dict
 
 
@@ -468,3 +539,9 @@ def generate_aptitude_task(program: str, task_type: TaskType) -> dict:
 #   1. No unused tasks in bank (lines 168-176)
 #   2. No valid disambiguate tasks (lines 200-208)
 #
+# Async / batch generation (bounded concurrency, timeouts, retries) lives in
+# model/generation_service.py and reuses the prompt builders above.
+#
+# model/bank_prefiller.py keeps the live bank pools above a watermark in the
+# background (tools.publish_microtasks), so sessions do not wait on generation.
+#
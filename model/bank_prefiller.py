@@ -0,0 +1,174 @@
+"""
+Background pre-filler for the microtask bank.
+
+Keeps every (program, pool) in the live microtask index above a low
+watermark, for pools "broad", "R".."C" and "aptitude". When a pool drops
+below low_watermark, tasks are generated concurrently through
+GenerationService until it reaches target_size, and all new tasks of a round
+are published with one tools.publish_microtasks call. Sessions keep drawing
+from memory and never wait on an LLM call.
+
+Usage:
+    prefiller = BankPrefiller(low_watermark=4, target_size=8)
+    prefiller.start()        # daemon thread with its own event loop
+    ...
+    prefiller.stop()
+
+or a single round from a script / notebook:
+    BankPrefiller().refill_once_sync()
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Iterable, get_args
+from uuid import uuid4
+
+from agents import TaskType
+from generation_service import GenerationJob, GenerationService
+from tools import AXES, current_microtask_index, load_microtask_bank, load_program_store, publish_microtasks
+
+logger = logging.getLogger(__name__)
+
+POOLS = ("broad", *AXES, "aptitude")
+APTITUDE_TYPES = get_args(TaskType)
+
+
+class BankPrefiller:
+    """
+    Replenishes microtask pools that fall under a watermark.
+
+    Args:
+        programs: Programs to watch (default: all programs in the program store
+            or the bank file, so programs without any tasks get filled too)
+        pools: Pool keys to watch per program
+        low_watermark: Refill a pool once it holds fewer tasks than this
+        target_size: Size a pool is refilled to
+        interval: Seconds between checks when running in the background
+        service: GenerationService to use; the default one bypasses the
+            response cache, since identical prompts must yield new tasks here
+    """
+
+    def __init__(
+        self,
+        programs: Iterable[str] | None = None,
+        pools: Iterable[str] = POOLS,
+        low_watermark: int = 4,
+        target_size: int = 8,
+        interval: float = 60.0,
+        service: GenerationService | None = None,
+    ):
+        if programs is None:
+            programs = dict.fromkeys([*load_program_store().names, *load_microtask_bank()])
+        self.programs = list(programs)
+        self.pools = tuple(pools)
+        self.low_watermark = low_watermark
+        self.target_size = max(target_size, low_watermark)
+        self.interval = interval
+        self.service = service if service is not None else GenerationService(use_cache=False)
+        self.published = 0
+        self.failed = 0  # failed generation jobs and failed refill rounds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def deficits(self) -> dict[tuple[str, str], int]:
+        """(program, pool) -> number of tasks missing to reach target_size, for pools under the watermark."""
+        index = current_microtask_index()
+        missing = {}
+        for program in self.programs:
+            for key in self.pools:
+                size = len(index.pool(program, key))
+                if size < self.low_watermark:
+                    missing[(program, key)] = self.target_size - size
+        return missing
+
+    def jobs(self, program: str, key: str, n: int) -> list[GenerationJob]:
+        """Generation jobs that add n tasks to one pool."""
+        if key == "aptitude":
+            return [
+                GenerationJob(program, kind="aptitude", task_type=APTITUDE_TYPES[i % len(APTITUDE_TYPES)])
+                for i in range(n)
+            ]
+        # "broad" or a single axis, as agents.generate_microtask expects
+        return [GenerationJob(program, policy=key) for _ in range(n)]
+
+    @staticmethod
+    def _bank_entry(program: str, key: str, task: dict) -> dict:
+        """Add the fields bank tasks carry (aptitude tasks already have their envelope)."""
+        if key == "aptitude":
+            return task
+        return {
+            "question_code": f"gen-{program[:3].lower()}-{key.lower()}-{uuid4().hex[:6]}",
+            **task,
+            "type": "mcq",
+            "signalType": "personality",
+        }
+
+    async def refill_once(self) -> dict[tuple[str, str], int]:
+        """
+        Generate tasks for all pools under the watermark and publish them in one swap.
+
+        Returns:
+            dict: (program, pool) -> number of tasks published
+        """
+        jobs, keys = [], []
+        for (program, key), n in self.deficits().items():
+            for job in self.jobs(program, key, n):
+                jobs.append(job)
+                keys.append((program, key))
+        if not jobs:
+            return {}
+
+        results = await self.service.run_batch(jobs)
+
+        new_tasks: dict[str, dict[str, list]] = defaultdict(lambda: defaultdict(list))
+        # questions already in the bank or earlier in this batch are dropped
+        seen_questions = {task.get("question") for task in current_microtask_index().tasks}
+        published: dict[tuple[str, str], int] = defaultdict(int)
+        for (program, key), result in zip(keys, results):
+            if not result.ok:
+                self.failed += 1
+                continue
+            if result.task["question"] in seen_questions:
+                continue
+            seen_questions.add(result.task["question"])
+            new_tasks[program][key].append(self._bank_entry(program, key, result.task))
+            published[(program, key)] += 1
+
+        if new_tasks:
+            publish_microtasks(new_tasks)
+            self.published += sum(published.values())
+        return dict(published)
+
+    def refill_once_sync(self) -> dict[tuple[str, str], int]:
+        """Blocking refill_once for scripts and notebooks without a running loop."""
+        return asyncio.run(self.refill_once())
+
+    async def run(self):
+        """
+        Refill, then wait `interval` seconds, until stop() is called. A failed
+        round is logged and counted in `failed`; the loop carries on.
+        """
+        while not self._stop.is_set():
+            try:
+                await self.refill_once()
+            except Exception:
+                self.failed += 1
+                logger.exception("microtask prefill round failed")
+            await asyncio.get_running_loop().run_in_executor(None, self._stop.wait, self.interval)
+
+    def start(self) -> threading.Thread:
+        """Run the refill loop on a daemon thread with its own event loop."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="bank-prefiller", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float | None = None):
+        """Signal the loop to stop and wait for the current round to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,191 @@
+"""
+Async generation service for microtasks and aptitude challenges.
+
+Wraps the agents in agents.py with asyncio so many generation jobs can run at
+once instead of blocking on one LLM round trip at a time:
+- generate_microtask_async / generate_aptitude_task_async: same inputs and
+  output as the sync functions in agents.py
+- GenerationService.run_batch: fans out many jobs with a concurrency limit
+  (semaphore), a per-job timeout and retry with exponential backoff
+
+Identical prompts are served from the on-disk response cache (see
+response_cache.py) only with use_cache=True: the same prompt always maps to
+the same entry, so by default every call generates a new task. Every call takes an optional
+`model`, passed through to Agent.run and part of the cache key, so the
+service can run against a local fake model, e.g.
+    from pydantic_ai.models.test import TestModel
+    GenerationService(model=TestModel()).generate_batch(jobs)
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from agents import (
+    TaskType,
+    aptitude_cache_key,
+    aptitude_envelope,
+    aptitude_generator,
+    build_aptitude_prompt,
+    build_microtask_prompt,
+    check_target_axes,
+    generator,
+    microtask_cache_key,
+)
+from response_cache import get_response_cache
+
+
+async def generate_microtask_async(
+    program: str,
+    policy: str,
+    target_axes: list[str] | None = None,
+    model: Any = None,
+    use_cache: bool = False
+) -> dict:
+    """
+    Async counterpart of agents.generate_microtask.
+
+    Args:
+        program: Program name (e.g., "Mathematics")
+        policy: "broad" or single axis ("R", "I", "A", "S", "E", "C")
+        target_axes: For disambiguate_top2, the [top1, top2] axes to include in options
+        model: Optional model override (e.g. a pydantic_ai TestModel)
+        use_cache: Serve identical prompts from the on-disk response cache (default off)
+
+    Returns:
+        dict: Microtask with 'question' and 'options' fields
+    """
+    prompt = build_microtask_prompt(program, policy, target_axes)
+    cache = get_response_cache() if use_cache else None
+    key = microtask_cache_key(prompt, model)
+    if cache is not None and (task := cache.get(key)) is not None:
+        return task
+
+    result = await generator.run(prompt, model=model)
+    task = check_target_axes(result.output.model_dump(), target_axes)
+    if cache is not None:
+        cache.put(key, task)
+    return task
+
+
+async def generate_aptitude_task_async(
+    program: str,
+    task_type: TaskType,
+    model: Any = None,
+    use_cache: bool = False
+) -> dict:
+    """
+    Async counterpart of agents.generate_aptitude_task.
+
+    Args:
+        program: programme name, for example Archaeology.
+        task_type: one of puzzle, classify, codeorder, fillblank, graph.
+        model: Optional model override (e.g. a pydantic_ai TestModel)
+        use_cache: Serve identical prompts from the on-disk response cache (default off)
+    """
+    prompt = build_aptitude_prompt(program, task_type)
+    cache = get_response_cache() if use_cache else None
+    key = aptitude_cache_key(prompt, model)
+    if cache is not None and (task_dict := cache.get(key)) is not None:
+        return task_dict
+
+    result = await aptitude_generator.run(prompt, model=model)
+    task_dict = aptitude_envelope(result.output.model_dump(), program, task_type)
+    if cache is not None:
+        cache.put(key, task_dict)
+    return task_dict
+
+
+@dataclass(frozen=True)
+class GenerationJob:
+    """
+    One generation request.
+
+    kind="microtask" uses policy/target_axes, kind="aptitude" uses task_type.
+    """
+    program: str
+    policy: str = "broad"
+    target_axes: tuple[str, ...] | None = None
+    kind: str = "microtask"
+    task_type: TaskType | None = None
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of a job: task on success, error message once retries are exhausted."""
+    job: GenerationJob
+    task: dict | None = None
+    error: str | None = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.task is not None
+
+
+@dataclass
+class GenerationService:
+    """
+    Bounded-concurrency runner for generation jobs.
+
+    Args:
+        max_concurrency: Jobs in flight at once (one semaphore per batch)
+        timeout: Seconds allowed per attempt
+        retries: Extra attempts after the first failure
+        backoff: Base delay in seconds, doubled per retry with jitter
+        model: Optional model override passed to every agent run
+        use_cache: Serve identical prompts from the on-disk response cache (default off)
+    """
+    max_concurrency: int = 8
+    timeout: float = 60.0
+    retries: int = 3
+    backoff: float = 1.0
+    model: Any = None
+    use_cache: bool = False
+    retry_on: tuple[type[BaseException], ...] = field(default=(Exception,))
+
+    async def generate(self, job: GenerationJob) -> dict:
+        """Run a single job once, without timeout or retry."""
+        if job.kind == "microtask":
+            target_axes = list(job.target_axes) if job.target_axes else None
+            return await generate_microtask_async(
+                job.program, job.policy, target_axes, model=self.model, use_cache=self.use_cache
+            )
+        if job.kind == "aptitude":
+            if job.task_type is None:
+                raise ValueError("aptitude jobs need a task_type")
+            return await generate_aptitude_task_async(
+                job.program, job.task_type, model=self.model, use_cache=self.use_cache
+            )
+        raise ValueError(f"Unknown job kind {job.kind!r}")
+
+    async def _run_job(self, job: GenerationJob, semaphore: asyncio.Semaphore) -> GenerationResult:
+        result = GenerationResult(job)
+        start = time.perf_counter()
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                result.attempts = attempt + 1
+                try:
+                    result.task = await asyncio.wait_for(self.generate(job), self.timeout)
+                    result.error = None
+                    break
+                except asyncio.TimeoutError:
+                    result.error = f"TimeoutError: no result after {self.timeout}s"
+                except self.retry_on as e:
+                    result.error = f"{type(e).__name__}: {e}"
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        result.seconds = time.perf_counter() - start
+        return result
+
+    async def run_batch(self, jobs: Iterable[GenerationJob]) -> list[GenerationResult]:
+        """Run all jobs concurrently (at most max_concurrency at once), results in job order."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self._run_job(job, semaphore) for job in jobs))
+
+    def generate_batch(self, jobs: Iterable[GenerationJob]) -> list[GenerationResult]:
+        """Blocking wrapper around run_batch for scripts and notebooks without a running loop."""
+        return asyncio.run(self.run_batch(jobs))
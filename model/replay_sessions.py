@@ -0,0 +1,342 @@
+"""
+Offline replay of recorded sessions for tuning the adaptive loop.
+
+Recorded sessions (RIASEC test ranking, then the answered microtasks with their
+program and preference) are pushed through the Tools update rule and the
+stopping policies under every candidate setting of
+    scaling_factor x entropy_threshold x gap_threshold x verify_gap_threshold
+and one summary row per setting is reported:
+- questions to stop (mean, p50, p95) and the share of sessions that stop
+  within their recorded answers
+- recommendation stability: top-1 agreement and top-3 overlap between the
+  recommendations at the stopping point and after all recorded answers
+- broad share: fraction of served questions that would use broad exploration
+  (gap < verify_gap_threshold) rather than top-2 disambiguation
+
+Answers are replayed as recorded: a setting that stops earlier simply uses a
+prefix of the log, so what students would have answered to different tasks is
+not modelled. Preferences only reorder programs and do not move the profile,
+so they do not change the results.
+
+Trajectories depend on the scaling factor only. Each worker computes them for
+one (scaling factor, chunk of sessions) job with apply_answers_batch (every
+session advances one answer per array operation), against the store the logs
+were encoded with (sent to each worker once), and then evaluates all
+threshold combinations on the cached stopping statistics (stopping.first_stop).
+
+Logs: JSONL with one session per line (or a .json file with a list of them)
+    {"session_id": "...", "student_choice": ["I", "R", "A", "S", "E", "C"],
+     "answers": [{"task_answer": "I", "program": "Mathematics", "task_preference": "positive"}, ...]}
+or a CSV / Parquet event table with columns
+    session_id, step (0 = RIASEC test), student_choice (e.g. "IRASEC", step 0 only),
+    task_answer (axis letter or index), program, task_preference
+
+Usage:
+    python model/replay_sessions.py --logs logs/open_day_2025.jsonl \\
+        --scaling-factors 0.1,0.15,0.2 --entropy-thresholds 1.1,1.2,1.3 \\
+        --gap-thresholds 0.1,0.15,0.2 --verify-gap-thresholds 0.08,0.12 --label season-2025
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from simulate_sessions import write_table
+from stopping import AtLeastSteps, default_policy, first_stop, trajectory_stats
+from tools import AXES, ProgramStore, apply_answers_batch, load_program_store
+
+PERCENTILES = (50, 95)
+
+# program store of this worker process, set by _init_worker
+_STORE: ProgramStore | None = None
+
+
+def _init_worker(store: ProgramStore):
+    global _STORE
+    _STORE = store
+
+
+def _axis(value) -> int:
+    return AXES.index(value) if isinstance(value, str) else int(value)
+
+
+def _choice(value) -> list[str]:
+    choice = list(value) if not isinstance(value, str) else list(value.replace(",", "").replace(" ", ""))
+    if sorted(choice) != sorted(AXES):
+        raise ValueError(f"student_choice must rank each of {AXES} once, got {value!r}")
+    return choice
+
+
+def read_logs(path) -> list[dict]:
+    """Recorded sessions as dicts with session_id, student_choice and answers."""
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            sessions = json.load(f)
+        if not isinstance(sessions, list):
+            raise ValueError(f"{path} must hold a JSON list of sessions")
+        return sessions
+
+    events = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+    sessions = []
+    for session_id, rows in events.sort_values(["session_id", "step"]).groupby("session_id", sort=False):
+        first = rows.iloc[0]
+        if first["step"] != 0:
+            raise ValueError(f"Session {session_id!r} has no RIASEC test row (step 0)")
+        sessions.append({
+            "session_id": session_id,
+            "student_choice": first["student_choice"],
+            "answers": rows.iloc[1:][["task_answer", "program", "task_preference"]].to_dict("records"),
+        })
+    return sessions
+
+
+class ReplayLogs:
+    """
+    Recorded sessions as padded arrays against a program store.
+
+    Attributes:
+        store: ProgramStore the program rows refer to
+        session_ids: N session ids
+        first_axis: N first-preference axes of the RIASEC test
+        answers, programs: N x L answered axes and program rows (-1 padding)
+        lengths: N recorded microtask answers per session
+        skipped: {session_id: reason} for sessions that could not be replayed
+    """
+
+    def __init__(self, sessions: list[dict], store: ProgramStore):
+        self.store = store
+        self.session_ids, first_axis, answers, programs = [], [], [], []
+        self.skipped = {}
+        for session in sessions:
+            session_id = session.get("session_id", len(self.session_ids) + len(self.skipped))
+            try:
+                choice = _choice(session["student_choice"])
+                answered = [_axis(a["task_answer"]) for a in session["answers"]]
+                rows = [store.index[a["program"]] for a in session["answers"]]
+            except KeyError as e:
+                self.skipped[session_id] = f"unknown program or missing field {e}"
+                continue
+            except ValueError as e:
+                self.skipped[session_id] = str(e)
+                continue
+            self.session_ids.append(session_id)
+            first_axis.append(AXES.index(choice[0]))
+            answers.append(answered)
+            programs.append(rows)
+
+        self.lengths = np.array([len(a) for a in answers], dtype=np.int64)
+        width = int(self.lengths.max()) if len(self.lengths) else 0
+        self.first_axis = np.array(first_axis, dtype=np.intp)
+        self.answers = np.zeros((len(answers), width), dtype=np.intp)
+        self.programs = np.full((len(answers), width), -1, dtype=np.intp)
+        for i, (answered, rows) in enumerate(zip(answers, programs)):
+            self.answers[i, :len(answered)] = answered
+            self.programs[i, :len(rows)] = rows
+
+    def __len__(self) -> int:
+        return len(self.session_ids)
+
+    def chunk(self, rows: np.ndarray) -> tuple:
+        """Picklable arrays for a worker."""
+        return self.first_axis[rows], self.answers[rows], self.programs[rows], self.lengths[rows]
+
+
+def trajectories(store: ProgramStore, first_axis, answers, programs, lengths, scaling_factor: float) -> np.ndarray:
+    """
+    N x (L + 1) x 6 student vectors: after the RIASEC test, then after each
+    recorded answer (rows past a session's length repeat its last vector).
+    """
+    n, width = answers.shape
+    X = np.empty((n, width + 1, len(AXES)))
+    S = np.ones((n, len(AXES))) / np.sqrt(len(AXES))
+    S = apply_answers_batch(store, S, first_axis, scaling_factors=scaling_factor)
+    X[:, 0] = S
+    for t in range(width):
+        active = lengths > t
+        S = S.copy()
+        if active.any():
+            S[active] = apply_answers_batch(
+                store, S[active], answers[active, t], programs[active, t], scaling_factors=scaling_factor
+            )
+        X[:, t + 1] = S
+    return X
+
+
+def _top_k(store: ProgramStore, vectors: np.ndarray, k: int = 3) -> np.ndarray:
+    # euclidean ranking as nearest_programs, for many vectors at once (||s||^2 does not change the order)
+    distances = store.sq_norms[None, :] - 2.0 * vectors @ store.vectors.T
+    return np.argsort(distances, axis=1, kind="stable")[:, :k]
+
+
+def replay_chunk(job: tuple) -> list[dict]:
+    """
+    Replay one chunk of sessions under one scaling factor and every threshold
+    setting, against the worker's store (see _init_worker).
+
+    Returns:
+        list: one dict per setting with per-session arrays (questions, stopped,
+            top1_stable, top3_overlap) and served / broad question counts
+    """
+    scaling_factor, arrays, thresholds, verify_thresholds, max_steps = job
+    store = _STORE
+    first_axis, answers, programs, lengths = arrays
+    n = len(lengths)
+    rows = np.arange(n)
+
+    X = trajectories(store, first_axis, answers, programs, lengths, scaling_factor)
+    stats = trajectory_stats(X, first_step=1)
+    gaps = stats.gap.reshape(n, -1)
+    final_top = _top_k(store, X[rows, lengths])
+
+    results = []
+    for entropy_threshold, gap_threshold in thresholds:
+        policy = default_policy(entropy_threshold, gap_threshold)
+        if max_steps:
+            policy = policy | AtLeastSteps(max_steps)
+        stop = first_stop(policy, X, lengths=lengths + 1, first_step=1, stats=stats)
+        stopped = stop > 0
+        # microtasks answered before stopping; the RIASEC test is answer 1
+        questions = np.where(stopped, stop - 1, lengths)
+        stop_top = _top_k(store, X[rows, questions])
+        top3_overlap = np.array([len(set(a) & set(b)) / 3.0 for a, b in zip(stop_top, final_top)])
+
+        # questions are served after vectors 0 .. questions - 1
+        served = np.arange(gaps.shape[1]) < questions[:, None]
+        for verify_gap_threshold in verify_thresholds:
+            results.append({
+                "scaling_factor": scaling_factor,
+                "entropy_threshold": entropy_threshold,
+                "gap_threshold": gap_threshold,
+                "verify_gap_threshold": verify_gap_threshold,
+                "questions": questions,
+                "stopped": stopped,
+                "top1_stable": stop_top[:, 0] == final_top[:, 0],
+                "top3_overlap": top3_overlap,
+                "served": int(served.sum()),
+                "broad": int((served & (gaps < verify_gap_threshold)).sum()),
+            })
+    return results
+
+
+def run_grid(
+    logs: ReplayLogs,
+    scaling_factors,
+    entropy_thresholds,
+    gap_thresholds,
+    verify_gap_thresholds,
+    max_steps: int | None = None,
+    workers: int | None = None,
+    chunk_size: int = 2000,
+) -> tuple[pd.DataFrame, float]:
+    """
+    Replay all sessions under the full grid on a process pool, against the
+    store the logs were encoded with (logs.store).
+
+    Returns:
+        tuple: (one summary row per setting, wall time in seconds)
+    """
+    workers = workers or os.cpu_count() or 1
+    thresholds = list(itertools.product(entropy_thresholds, gap_thresholds))
+    chunks = [np.arange(i, min(i + chunk_size, len(logs))) for i in range(0, len(logs), chunk_size)]
+    jobs = [
+        (float(sf), logs.chunk(rows), thresholds, list(verify_gap_thresholds), max_steps)
+        for sf in scaling_factors
+        for rows in chunks
+    ]
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(logs.store)
+        parts = list(map(replay_chunk, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(logs.store,)) as pool:
+            parts = list(pool.map(replay_chunk, jobs))
+    wall = time.perf_counter() - start
+
+    # merge the chunks of every setting
+    merged: dict[tuple, list[dict]] = {}
+    for part in parts:
+        for result in part:
+            key = (result["scaling_factor"], result["entropy_threshold"],
+                   result["gap_threshold"], result["verify_gap_threshold"])
+            merged.setdefault(key, []).append(result)
+
+    rows = []
+    for key, results in merged.items():
+        questions = np.concatenate([r["questions"] for r in results])
+        served = sum(r["served"] for r in results)
+        row = dict(zip(("scaling_factor", "entropy_threshold", "gap_threshold", "verify_gap_threshold"), key))
+        row.update({
+            "sessions": len(questions),
+            "stopped_share": float(np.concatenate([r["stopped"] for r in results]).mean()),
+            "questions_mean": float(questions.mean()),
+        })
+        for p, value in zip(PERCENTILES, np.percentile(questions, PERCENTILES)):
+            row[f"questions_p{p}"] = float(value)
+        row.update({
+            "top1_stable": float(np.concatenate([r["top1_stable"] for r in results]).mean()),
+            "top3_overlap": float(np.concatenate([r["top3_overlap"] for r in results]).mean()),
+            "broad_share": sum(r["broad"] for r in results) / served if served else float("nan"),
+        })
+        rows.append(row)
+    return pd.DataFrame(rows), wall
+
+
+def _floats(text: str) -> list[float]:
+    return [float(x) for x in text.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", required=True, help="session log (.jsonl, .csv or .parquet)")
+    parser.add_argument("--scaling-factors", type=_floats, default=[0.15])
+    parser.add_argument("--entropy-thresholds", type=_floats, default=[1.20])
+    parser.add_argument("--gap-thresholds", type=_floats, default=[0.15])
+    parser.add_argument("--verify-gap-thresholds", type=_floats, default=[0.12])
+    parser.add_argument("--max-steps", type=int, default=None, help="also stop after this many answers (the RIASEC test counts as one)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=2000, help="sessions per worker job")
+    parser.add_argument("--label", default="dev", help="label stored with every row")
+    parser.add_argument("--out", default="diagnostics_and_pipeline/replay")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    args = parser.parse_args()
+
+    logs = ReplayLogs(read_logs(args.logs), load_program_store())
+    summary, wall = run_grid(
+        logs,
+        args.scaling_factors,
+        args.entropy_thresholds,
+        args.gap_thresholds,
+        args.verify_gap_thresholds,
+        max_steps=args.max_steps,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    summary = summary.sort_values(["scaling_factor", "entropy_threshold", "gap_threshold", "verify_gap_threshold"])
+    summary.insert(0, "label", args.label)
+
+    out = Path(args.out) / args.label
+    out.mkdir(parents=True, exist_ok=True)
+    path = write_table(summary, out / "summary", args.format)
+
+    print(f"{len(logs)} sessions x {len(summary)} settings in {wall:.2f}s ({len(logs.skipped)} skipped)")
+    print(summary.drop(columns=["label"]).to_string(index=False, float_format="%.3f"))
+    if logs.skipped:
+        print("\nskipped:")
+        print(pd.Series(logs.skipped).value_counts().head(10).to_string())
+    print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Persistent, content-addressed cache for LLM generation results.
+
+Entries are keyed by a SHA-256 of everything that determines the answer:
+model name, system prompt, rendered user prompt and output JSON schema.
+Only validated outputs are stored, so re-running a bank-building notebook
+only pays for prompts that were never answered before (including after a
+crash halfway through).
+
+Storage is a single SQLite file (stdlib, safe across processes). Entries
+older than max_age_days are treated as missing by get() and deleted by
+evict(); beyond max_entries the least recently used entries are evicted.
+
+The key has no per-call component, so callers that need a new output for
+the same prompt (new microtasks, aptitude challenges) must not read the
+cache; the generation functions only use it with use_cache=True.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+_PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_CACHE_PATH = _PROJECT_ROOT / "data" / ".cache" / "llm_responses.sqlite"
+
+
+def cache_key(model: str, system_prompt: str, prompt: str, schema: dict) -> str:
+    """SHA-256 over the canonical JSON of all inputs that determine a response."""
+    payload = json.dumps(
+        {"model": model, "system_prompt": system_prompt, "prompt": prompt, "schema": schema},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of validated generation outputs.
+
+    Args:
+        path: SQLite file (created on first use)
+        max_entries: Keep at most this many entries (least recently used evicted)
+        max_age_days: Entries older than this are treated as missing and evicted
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH, max_entries: int = 20000, max_age_days: float = 180):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def get(self, key: str) -> dict | None:
+        """Cached output for key, or None (counted as a miss)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?", (key, now - self.max_age)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict) -> None:
+        """Store a validated output and evict if the cache grew past max_entries."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            n = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if n > self.max_entries:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones beyond max_entries. Returns rows removed."""
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,)
+            ).rowcount
+            removed += self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Hit/miss counters of this process plus the current number of entries."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+
+@lru_cache(maxsize=None)
+def get_response_cache(path: Path | str = DEFAULT_CACHE_PATH) -> ResponseCache:
+    """Shared cache instance per path (one SQLite connection per process)."""
+    return ResponseCache(path)
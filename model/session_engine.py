@@ -0,0 +1,253 @@
+"""
+Stateless session engine for the adaptive RIASEC loop.
+
+Everything a worker needs to continue a session lives in a small SessionState
+(student vector, task order, asked / seen masks, RNG state and the pending
+task). The shared, read-only data (ProgramStore, MicrotaskIndex) is loaded once
+per process, so any worker can resume any session from its serialized state:
+
+    state, task = new_session(["I", "R", "A", "S", "E", "C"], seed=7)
+    token = state.to_token()                     # cookie / key-value store
+    ...
+    state = SessionState.from_token(token)       # on any worker
+    state, nxt = step(state, answer=1, preference="positive")
+
+`nxt` is the next microtask (dict) or, once the profile is confident, the
+recommendations (list), as Tools.update_student_vectors returns them. The
+policy is the one Tools implements (same update, stopping rule, task order
+and microtask selection); random draws come from the state's own generator.
+"""
+
+import base64
+import struct
+
+import numpy as np
+
+from tools import (
+    AXES,
+    MicrotaskIndex,
+    ProgramStore,
+    apply_answers_batch,
+    current_microtask_index,
+    load_program_store,
+    recommend,
+    select_microtask,
+)
+from stopping import DEFAULT_POLICY, ProfileStats, StoppingPolicy
+
+FORMAT_VERSION = 1
+MAX_ORDER = 6
+# version, programs, tasks, questions, pending program, pending task, has_uint32, uinteger
+_HEADER = struct.Struct("<BHIHhiBI")
+_VECTOR = struct.Struct("<6d")
+
+
+class SessionState:
+    """
+    Per-student state of one session, a few hundred bytes when serialized.
+
+    Attributes:
+        student_vector: 6D RIASEC profile (float64)
+        task_order: program task order, 0..6 (int8, one per store row)
+        asked: programs already asked about (bool, one per store row)
+        seen: microtask ids already shown (bool, one per index task)
+        rng: PCG64 generator for program ties and task draws
+        program: store row of the pending task's program, -1 for none
+        task_id: pending task id, -1 for none
+        questions: answers applied so far (the RIASEC test counts as one)
+    """
+
+    __slots__ = ("student_vector", "task_order", "asked", "seen", "rng", "program", "task_id", "questions")
+
+    def __init__(self, student_vector, task_order, asked, seen, rng, program=-1, task_id=-1, questions=0):
+        self.student_vector = np.asarray(student_vector, dtype=np.float64)
+        self.task_order = np.asarray(task_order, dtype=np.int8)
+        self.asked = np.asarray(asked, dtype=bool)
+        self.seen = np.asarray(seen, dtype=bool)
+        self.rng = rng
+        self.program = program
+        self.task_id = task_id
+        self.questions = questions
+
+    def copy(self) -> "SessionState":
+        rng = np.random.Generator(np.random.PCG64())
+        rng.bit_generator.state = self.rng.bit_generator.state
+        return SessionState(
+            self.student_vector.copy(), self.task_order.copy(), self.asked.copy(), self.seen.copy(),
+            rng, self.program, self.task_id, self.questions,
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Binary layout: header, student vector, PCG64 state and increment (16
+        bytes each), task order as 4-bit values, then the asked and seen bitmaps.
+        """
+        bit_state = self.rng.bit_generator.state
+        if bit_state["bit_generator"] != "PCG64":
+            raise ValueError(f"Only PCG64 generators can be serialized, got {bit_state['bit_generator']}")
+        order = np.zeros(len(self.task_order) + len(self.task_order) % 2, dtype=np.uint8)
+        order[:len(self.task_order)] = self.task_order
+        return b"".join([
+            _HEADER.pack(
+                FORMAT_VERSION, len(self.task_order), len(self.seen), self.questions, self.program,
+                self.task_id, bit_state["has_uint32"], bit_state["uinteger"],
+            ),
+            _VECTOR.pack(*self.student_vector),
+            bit_state["state"]["state"].to_bytes(16, "little"),
+            bit_state["state"]["inc"].to_bytes(16, "little"),
+            (order[0::2] | (order[1::2] << 4)).tobytes(),
+            np.packbits(self.asked).tobytes(),
+            np.packbits(self.seen).tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SessionState":
+        version, n_programs, n_tasks, questions, program, task_id, has_uint32, uinteger = _HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported session state version {version}")
+        offset = _HEADER.size
+        student_vector = np.array(_VECTOR.unpack_from(data, offset))
+        offset += _VECTOR.size
+        rng = np.random.Generator(np.random.PCG64())
+        rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {
+                "state": int.from_bytes(data[offset:offset + 16], "little"),
+                "inc": int.from_bytes(data[offset + 16:offset + 32], "little"),
+            },
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+        offset += 32
+
+        packed = np.frombuffer(data, dtype=np.uint8, count=(n_programs + 1) // 2, offset=offset)
+        task_order = np.empty(2 * len(packed), dtype=np.int8)
+        task_order[0::2] = packed & 0x0F
+        task_order[1::2] = packed >> 4
+        offset += len(packed)
+        n_asked = (n_programs + 7) // 8
+        asked = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=n_asked, offset=offset), count=n_programs)
+        offset += n_asked
+        seen = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=(n_tasks + 7) // 8, offset=offset), count=n_tasks)
+        return cls(student_vector, task_order[:n_programs], asked.astype(bool), seen.astype(bool),
+                   rng, program, task_id, questions)
+
+    def to_token(self) -> str:
+        """URL-safe text form of to_bytes, for cookies and headers."""
+        return base64.urlsafe_b64encode(self.to_bytes()).decode("ascii")
+
+    @classmethod
+    def from_token(cls, token: str) -> "SessionState":
+        return cls.from_bytes(base64.urlsafe_b64decode(token.encode("ascii")))
+
+
+def _shared(store: ProgramStore | None, microtasks: MicrotaskIndex | None):
+    return (
+        store if store is not None else load_program_store(),
+        microtasks if microtasks is not None else current_microtask_index(),
+    )
+
+
+def _next_program(state: SessionState) -> int:
+    """Random program with the lowest task order, unasked programs first; marks it asked."""
+    candidates = np.flatnonzero(~state.asked) if not state.asked.all() else np.arange(len(state.asked))
+    candidates = candidates[state.task_order[candidates] == state.task_order[candidates].min()]
+    i = int(candidates[state.rng.integers(len(candidates))])
+    state.asked[i] = True
+    return i
+
+
+def _advance(state, store, microtasks, task_answer, program, scaling_factor, policy):
+    # apply one answer in place, then either recommend or fetch the next task;
+    # the step's stats are computed once for the stop check and the task choice
+    state.student_vector = apply_answers_batch(
+        store, state.student_vector[None, :], [task_answer], programs=[program], scaling_factors=scaling_factor
+    )[0]
+    state.questions += 1
+    stats = ProfileStats(state.student_vector, state.questions)
+
+    if (policy if policy is not None else DEFAULT_POLICY).stop(stats):
+        state.program = state.task_id = -1
+        return state, recommend(store, state.student_vector)
+
+    if len(state.seen) < len(microtasks):
+        # tasks were published since the state was saved, existing ids are unchanged
+        state.seen = np.concatenate([state.seen, np.zeros(len(microtasks) - len(state.seen), dtype=bool)])
+    state.program = _next_program(state)
+    task = select_microtask(
+        microtasks, state.student_vector, store.names[state.program], state.rng, seen=state.seen, stats=stats
+    )
+    state.task_id = task["meta"]["task_id"]
+    return state, task
+
+
+def new_session(
+    student_choice: list[str],
+    seed: int | None = None,
+    scaling_factor: float = 0.15,
+    store: ProgramStore | None = None,
+    microtasks: MicrotaskIndex | None = None,
+    policy: StoppingPolicy | None = None,
+):
+    """
+    Start a session from the RIASEC test ranking (most to least preferred),
+    as Tools.initiate_student_vectors + Tools.RIASEC_test.
+
+    Returns:
+        tuple: (SessionState, next microtask dict or list of recommendations)
+    """
+    store, microtasks = _shared(store, microtasks)
+    if sorted(student_choice) != sorted(AXES):
+        raise ValueError(f"student_choice must rank each of {AXES} once, got {student_choice!r}")
+    rank = np.empty(len(AXES), dtype=np.int8)
+    rank[[AXES.index(axis) for axis in student_choice]] = np.arange(1, len(AXES) + 1)
+
+    state = SessionState(
+        student_vector=np.ones(len(AXES)) / np.sqrt(len(AXES)),
+        task_order=rank[store.argmax_axis],
+        asked=np.zeros(len(store), dtype=bool),
+        seen=np.zeros(len(microtasks), dtype=bool),
+        rng=np.random.default_rng(seed),
+    )
+    return _advance(state, store, microtasks, AXES.index(student_choice[0]), -1, scaling_factor, policy)
+
+
+def step(
+    state: SessionState,
+    answer: int,
+    preference: str | None = None,
+    scaling_factor: float = 0.15,
+    store: ProgramStore | None = None,
+    microtasks: MicrotaskIndex | None = None,
+    policy: StoppingPolicy | None = None,
+):
+    """
+    Apply the answer to the pending task, as Tools.update_student_vectors.
+    The input state is left unchanged.
+
+    Args:
+        state: State returned by new_session or a previous step
+        answer: Answered RIASEC axis index (0-5)
+        preference: "positive" / "negative" moves the task's program up / down
+            in task order, None leaves it
+        scaling_factor: Update step size
+        policy: Stopping policy (default: the Tools entropy / gap rule)
+
+    Returns:
+        tuple: (new SessionState, next microtask dict or list of recommendations)
+
+    Raises:
+        ValueError: if the session has already finished (no pending task), e.g.
+            for a stale or replayed token
+    """
+    store, microtasks = _shared(store, microtasks)
+    if state.program < 0:
+        raise ValueError("Session has no pending task, recommendations were already returned")
+    if len(state.task_order) != len(store):
+        raise ValueError(f"Session state has {len(state.task_order)} programs, the store has {len(store)}")
+    state = state.copy()
+    if preference == "positive":
+        state.task_order[state.program] = max(0, state.task_order[state.program] - 1)
+    elif preference == "negative":
+        state.task_order[state.program] = min(MAX_ORDER, state.task_order[state.program] + 1)
+    return _advance(state, store, microtasks, int(answer), state.program, scaling_factor, policy)
@@ -0,0 +1,298 @@
+"""
+Batch session simulator and throughput benchmark for the Tools adaptive loop.
+
+Runs synthetic students through
+    RIASEC_test -> update_student_vectors -> fetch_microtask -> recommend_programs
+on a process pool and reports:
+- sessions per second
+- p50 / p95 / p99 latency per step (ms, inclusive of nested calls)
+- distribution of questions-to-stop over stopped sessions (capped ones counted apart)
+
+Results are written as columnar tables (Parquet when pyarrow is installed,
+CSV otherwise) so runs can be compared between releases:
+    <out>/sessions.<fmt>   one row per simulated session
+    <out>/steps.<fmt>      one row per timed Tools call
+    <out>/summary.<fmt>    latency percentiles per step
+
+Usage:
+    python model/simulate_sessions.py --sessions 5000 --workers 8 --label v0.3
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tools import AXES, ProgramStore, Tools, current_microtask_index, load_program_store
+
+
+# Tools methods that get timed; nested calls are timed as well
+TIMED_STEPS = ("RIASEC_test", "update_student_vectors", "fetch_microtask", "recommend_programs")
+PERCENTILES = (50, 95, 99)
+DEMO = {"age": 17, "hs_profile": "N&T"}
+
+
+def _timed(method, step: str, timings: list):
+    """Wrap a bound Tools method so every call appends (step, ms) to timings."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings.append((step, (time.perf_counter() - start) * 1000.0))
+    return wrapper
+
+
+class SyntheticStudent:
+    """
+    Student with a hidden RIASEC profile that answers microtasks noisily.
+
+    - RIASEC ranking: axes sorted by profile + gaussian noise
+    - Microtask answer: option whose axis has the highest profile + gumbel noise
+    - Preference: "positive" when the picked axis is the student's top axis,
+      "negative" when it is one of the bottom three, None otherwise
+    """
+
+    def __init__(self, rng: np.random.Generator, concentration: float = 0.7, noise: float = 0.05):
+        self.rng = rng
+        self.profile = rng.dirichlet(np.full(6, concentration))
+        self.noise = noise
+        self.ranking = np.argsort(-self.profile)
+
+    def riasec_choice(self) -> list[str]:
+        noisy = self.profile + self.rng.normal(0.0, self.noise, 6)
+        return [AXES[i] for i in np.argsort(-noisy)]
+
+    def answer(self, task: dict) -> tuple[int, str | None]:
+        axes = [AXES.index(option["riasec"]) for option in task["options"].values()]
+        utility = np.log(self.profile[axes] + 1e-12) + self.rng.gumbel(size=len(axes))
+        task_answer = axes[int(np.argmax(utility))]
+
+        if task_answer == self.ranking[0]:
+            return task_answer, "positive"
+        if task_answer in self.ranking[3:]:
+            return task_answer, "negative"
+        return task_answer, None
+
+
+def programs_with_tasks(store: ProgramStore, microtasks=None) -> ProgramStore:
+    """
+    Store restricted to the programs fetch_microtask can always serve: a
+    non-empty broad pool and a non-empty pool for every top-2 axis pair.
+    """
+    microtasks = microtasks if microtasks is not None else current_microtask_index()
+    keep = [
+        i for i, name in enumerate(store.names)
+        if len(microtasks.pool(name, "broad"))
+        and all(len(microtasks.pool(name, (a, b))) for a in AXES for b in AXES if a != b)
+    ]
+    return ProgramStore([store.names[i] for i in keep], store.vectors[keep])
+
+
+def simulate_session(
+    session_id: int,
+    seed: int,
+    max_questions: int = 40,
+    scaling_factor: float = 0.15,
+    all_programs: ProgramStore | None = None,
+) -> tuple[dict, list]:
+    """
+    Run one synthetic student through the adaptive loop.
+
+    Sessions that reach max_questions without stopping are recorded with
+    stopped=False (capped), not as stops.
+
+    Returns:
+        tuple: (session row, list of (session_id, step, ms) rows)
+    """
+    rng = np.random.default_rng(seed)
+    student = SyntheticStudent(rng)
+
+    timings: list = []
+    start = time.perf_counter()
+    row = {
+        "session_id": session_id,
+        "seed": seed,
+        "true_top_axis": AXES[student.ranking[0]],
+        "questions": 0,
+        "stopped": False,
+        "top_program": None,
+        "error": None,
+    }
+
+    try:
+        tools = Tools(seed=seed, all_programs=all_programs)
+        for step in TIMED_STEPS:
+            setattr(tools, step, _timed(getattr(tools, step), step, timings))
+
+        tools.initiate_student_vectors(avatar_chosen="simulated", demo=DEMO)
+        output = tools.RIASEC_test(student_choice=student.riasec_choice(), scaling_factor=scaling_factor)
+
+        while isinstance(output, dict) and row["questions"] < max_questions:
+            task_answer, task_preference = student.answer(output)
+            output = tools.update_student_vectors(
+                task_answer=task_answer,
+                task_preference=task_preference,
+                program=output["meta"]["program"],
+                scaling_factor=scaling_factor,
+            )
+            row["questions"] += 1
+
+        if isinstance(output, list):
+            row["stopped"] = True
+            row["top_program"] = output[0]["program"] if output else None
+        row["final_top_axis"] = AXES[int(np.argmax(tools.student_vector))]
+    except Exception as e:  # recorded per session, never hidden
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    row["total_ms"] = (time.perf_counter() - start) * 1000.0
+    return row, [(session_id, step, ms) for step, ms in timings]
+
+
+def _simulate_chunk(args: tuple) -> tuple[list, list]:
+    session_ids, base_seed, max_questions, scaling_factor, only_programs_with_tasks = args
+    store = programs_with_tasks(load_program_store()) if only_programs_with_tasks else None
+    sessions, steps = [], []
+    for session_id in session_ids:
+        row, timings = simulate_session(session_id, base_seed + session_id, max_questions, scaling_factor, store)
+        sessions.append(row)
+        steps.extend(timings)
+    return sessions, steps
+
+
+def run_simulation(
+    n_sessions: int = 1000,
+    workers: int | None = None,
+    seed: int = 0,
+    max_questions: int = 40,
+    scaling_factor: float = 0.15,
+    only_programs_with_tasks: bool = False,
+) -> tuple[pd.DataFrame, pd.DataFrame, float]:
+    """
+    Simulate n_sessions students on a process pool.
+
+    With only_programs_with_tasks, programs the microtask bank cannot serve
+    (see programs_with_tasks) are left out of every session.
+
+    Returns:
+        tuple: (sessions DataFrame, steps DataFrame, wall time in seconds)
+    """
+    workers = workers or os.cpu_count() or 1
+    n_chunks = max(1, min(n_sessions, workers * 4))
+    chunks = [
+        (ids.tolist(), seed, max_questions, scaling_factor, only_programs_with_tasks)
+        for ids in np.array_split(np.arange(n_sessions), n_chunks)
+    ]
+
+    sessions, steps = [], []
+    start = time.perf_counter()
+    if workers == 1:
+        results = map(_simulate_chunk, chunks)
+        for chunk_sessions, chunk_steps in results:
+            sessions.extend(chunk_sessions)
+            steps.extend(chunk_steps)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_sessions, chunk_steps in pool.map(_simulate_chunk, chunks):
+                sessions.extend(chunk_sessions)
+                steps.extend(chunk_steps)
+    wall = time.perf_counter() - start
+
+    sessions_df = pd.DataFrame(sessions)
+    steps_df = pd.DataFrame(steps, columns=["session_id", "step", "ms"])
+    return sessions_df, steps_df, wall
+
+
+def summarize(steps: pd.DataFrame) -> pd.DataFrame:
+    """Latency percentiles (ms) per step."""
+    rows = []
+    for step in TIMED_STEPS:
+        ms = steps.loc[steps["step"] == step, "ms"].to_numpy()
+        if len(ms) == 0:
+            continue
+        row = {"step": step, "calls": len(ms), "mean_ms": float(ms.mean())}
+        for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+            row[f"p{p}_ms"] = float(value)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def write_table(frame: pd.DataFrame, path: Path, fmt: str) -> Path:
+    """Write a table as Parquet or CSV; Parquet falls back to CSV without pyarrow."""
+    if fmt == "parquet":
+        try:
+            out = path.with_suffix(".parquet")
+            frame.to_parquet(out, index=False)
+            return out
+        except ImportError:
+            print("pyarrow not installed, writing CSV instead")
+    out = path.with_suffix(".csv")
+    frame.to_csv(out, index=False)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-questions", type=int, default=40)
+    parser.add_argument("--scaling-factor", type=float, default=0.15)
+    parser.add_argument("--only-programs-with-tasks", action="store_true",
+                        help="leave out programs without broad and top-2 microtasks in the bank")
+    parser.add_argument("--max-error-share", type=float, default=0.5,
+                        help="exit with an error when more sessions than this fail")
+    parser.add_argument("--label", default="dev", help="release label stored with every row")
+    parser.add_argument("--out", default="diagnostics_and_pipeline/benchmarks")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    args = parser.parse_args()
+
+    sessions, steps, wall = run_simulation(
+        n_sessions=args.sessions,
+        workers=args.workers,
+        seed=args.seed,
+        max_questions=args.max_questions,
+        scaling_factor=args.scaling_factor,
+        only_programs_with_tasks=args.only_programs_with_tasks,
+    )
+
+    failed = sessions["error"].notna()
+    if failed.mean() > args.max_error_share:
+        print(sessions.loc[failed, "error"].value_counts().head(10).to_string())
+        raise SystemExit(
+            f"{int(failed.sum())} of {args.sessions} sessions failed, timings would only cover the rest; "
+            f"fix the errors above or rerun with --only-programs-with-tasks"
+        )
+
+    summary = summarize(steps)
+    summary.insert(0, "sessions_per_s", args.sessions / wall)
+
+    for frame in (sessions, steps, summary):
+        frame.insert(0, "label", args.label)
+
+    out = Path(args.out) / args.label
+    out.mkdir(parents=True, exist_ok=True)
+    written = [write_table(frame, out / name, args.format)
+               for name, frame in (("sessions", sessions), ("steps", steps), ("summary", summary))]
+
+    stopped = sessions["stopped"] & ~failed
+    capped = ~sessions["stopped"] & ~failed
+    print(f"{args.sessions} sessions in {wall:.2f}s -> {args.sessions / wall:.1f} sessions/s "
+          f"({int(failed.sum())} failed, {int(capped.sum())} capped at {args.max_questions} questions)")
+    print(summary.drop(columns=["label", "sessions_per_s"]).to_string(index=False, float_format="%.3f"))
+    print("\nquestions to stop (stopped sessions only):")
+    print(sessions.loc[stopped, "questions"].describe(percentiles=[0.5, 0.95, 0.99]).to_string())
+    print(sessions.loc[stopped, "questions"].value_counts().sort_index().to_string())
+    if failed.any():
+        print("\nerrors:")
+        print(sessions.loc[failed, "error"].value_counts().to_string())
+    for path in written:
+        print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
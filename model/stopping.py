@@ -0,0 +1,188 @@
+"""
+Stopping policies for the adaptive RIASEC loop.
+
+ProfileStats computes the per-step statistics of one or many student vectors
+once (L1 profile, entropy, top-2 gap, axis order), and every consumer (the
+stopping check, microtask selection) reads them instead of re-deriving them.
+
+Policies are small objects evaluated on ProfileStats and return one stop flag
+per row, so the same policy runs for a live session (1 row) or for thousands
+of simulated sessions at once. They compose with | (any) and & (all):
+
+    policy = EntropyBelow(1.20) | GapAbove(0.15)           # Tools default
+    policy = (EntropyBelow(1.1) & AtLeastSteps(3)) | AtLeastSteps(25)
+
+AtLeastSteps is the one step-count predicate: combined with & it forbids stops
+before n answers (a minimum), combined with | it forces a stop at n (a cap).
+
+first_stop() applies a policy to whole recorded trajectories, which is what
+offline threshold tuning needs (see replay_sessions.py).
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+
+_EPS = 1e-12  # as _entropy in tools
+
+
+class ProfileStats:
+    """
+    Statistics of N student vectors at one step (N = 1 for a live session).
+
+    Attributes (arrays with one entry / row per vector):
+        probs: L1-normalized profiles (uniform where a vector sums to 0)
+        entropy: Shannon entropy of probs (natural log)
+        order: axis indices sorted by descending share
+        top, second: largest and second largest share
+        gap: top - second
+        steps: answers given so far
+    """
+
+    __slots__ = ("probs", "entropy", "order", "top", "second", "gap", "steps")
+
+    def __init__(self, student_vectors, steps=0):
+        S = np.array(student_vectors, dtype=np.float64, ndmin=2)
+        sums = S.sum(axis=1, keepdims=True)
+        self.probs = np.where(sums > 0, S / np.where(sums > 0, sums, 1.0), 1.0 / S.shape[1])
+        self.entropy = -(self.probs * np.log(np.clip(self.probs, _EPS, 1.0))).sum(axis=1)
+        self.order = np.argsort(-self.probs, axis=1, kind="stable")
+        rows = np.arange(len(S))
+        self.top = self.probs[rows, self.order[:, 0]]
+        self.second = self.probs[rows, self.order[:, 1]]
+        self.gap = self.top - self.second
+        self.steps = np.broadcast_to(np.asarray(steps, dtype=np.int64), (len(S),))
+
+    def __len__(self) -> int:
+        return len(self.probs)
+
+
+class StoppingPolicy(ABC):
+    """Base class: __call__(stats) -> boolean stop mask with one entry per row."""
+
+    @abstractmethod
+    def __call__(self, stats: ProfileStats) -> np.ndarray:
+        ...
+
+    def __or__(self, other: "StoppingPolicy") -> "StoppingPolicy":
+        return AnyOf((self, other))
+
+    def __and__(self, other: "StoppingPolicy") -> "StoppingPolicy":
+        return AllOf((self, other))
+
+    def stop(self, stats: ProfileStats) -> bool:
+        """Decision for a single session."""
+        return bool(self(stats)[0])
+
+
+@dataclass(frozen=True)
+class EntropyBelow(StoppingPolicy):
+    """Stop once the profile is concentrated: entropy < threshold."""
+    threshold: float = 1.20
+
+    def __call__(self, stats):
+        return stats.entropy < self.threshold
+
+
+@dataclass(frozen=True)
+class GapAbove(StoppingPolicy):
+    """Stop once one axis clearly leads: top-1 minus top-2 share > threshold."""
+    threshold: float = 0.15
+
+    def __call__(self, stats):
+        return stats.gap > self.threshold
+
+
+@dataclass(frozen=True)
+class PosteriorConfidence(StoppingPolicy):
+    """
+    Stop once the leading axis holds at least `threshold` of the profile,
+    reading the L1 profile as a posterior over the six axes.
+    """
+    threshold: float = 0.30
+
+    def __call__(self, stats):
+        return stats.top >= self.threshold
+
+
+@dataclass(frozen=True)
+class AtLeastSteps(StoppingPolicy):
+    """True from `n` answers on: | AtLeastSteps(n) caps a session, & sets a minimum."""
+    n: int
+
+    def __call__(self, stats):
+        return stats.steps >= self.n
+
+
+@dataclass(frozen=True)
+class AnyOf(StoppingPolicy):
+    policies: tuple
+
+    def __call__(self, stats):
+        out = np.zeros(len(stats), dtype=bool)
+        for policy in self.policies:
+            out |= policy(stats)
+        return out
+
+
+@dataclass(frozen=True)
+class AllOf(StoppingPolicy):
+    policies: tuple
+
+    def __call__(self, stats):
+        out = np.ones(len(stats), dtype=bool)
+        for policy in self.policies:
+            out &= policy(stats)
+        return out
+
+
+def default_policy(entropy_threshold: float = 1.20, gap_threshold: float = 0.15) -> StoppingPolicy:
+    """The rule Tools.check_stopping_point has always used."""
+    return EntropyBelow(entropy_threshold) | GapAbove(gap_threshold)
+
+
+DEFAULT_POLICY = default_policy()
+
+
+def trajectory_stats(trajectories, first_step: int = 1) -> ProfileStats:
+    """
+    ProfileStats of every vector in N x T x 6 trajectories (flattened row-major),
+    with steps first_step .. first_step + T - 1; compute once, evaluate many policies.
+    """
+    X = np.asarray(trajectories, dtype=np.float64)
+    n, t, d = X.shape
+    return ProfileStats(X.reshape(n * t, d), np.tile(first_step + np.arange(t), n))
+
+
+def first_stop(
+    policy: StoppingPolicy,
+    trajectories,
+    lengths=None,
+    first_step: int = 1,
+    stats: ProfileStats | None = None
+) -> np.ndarray:
+    """
+    Step at which `policy` first fires for each recorded session.
+
+    Args:
+        policy: Policy to evaluate
+        trajectories: N x T x 6 student vectors, trajectories[i, t] being the
+            vector after answer first_step + t
+        lengths: Recorded steps per session (default: all T); rows past a
+            session's length are ignored
+        first_step: Answer count of the first recorded vector
+        stats: trajectory_stats(trajectories, first_step), when evaluating
+            several policies on the same trajectories
+
+    Returns:
+        np.ndarray: N answer counts (first_step + t) at which the session stops,
+            -1 where the policy never fires within the recorded steps
+    """
+    n, t = np.shape(trajectories)[:2]
+    if stats is None:
+        stats = trajectory_stats(trajectories, first_step)
+    fired = policy(stats).reshape(n, t)
+    if lengths is not None:
+        fired &= np.arange(t) < np.asarray(lengths)[:, None]
+    return np.where(fired.any(axis=1), first_step + fired.argmax(axis=1), -1)
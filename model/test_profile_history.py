@@ -0,0 +1,32 @@
+import numpy as np
+
+from tools import AXES, ProfileHistory
+
+
+def test_change_measures_from_session_start_after_wraparound():
+    history = ProfileHistory(max_steps=4)
+    vectors = [np.full(len(AXES), i, dtype=float) for i in range(10)]
+    for v in vectors:
+        history.record(v)
+
+    assert history.steps == 10
+    assert len(history) == 4
+    np.testing.assert_array_equal(history.trajectory(), np.stack(vectors[-4:]))
+    np.testing.assert_allclose(history.change(), vectors[-1] - vectors[0])
+
+
+def test_change_is_zero_before_two_steps():
+    history = ProfileHistory(max_steps=4)
+    np.testing.assert_array_equal(history.change(), np.zeros(len(AXES)))
+    history.record(np.ones(len(AXES)))
+    np.testing.assert_array_equal(history.change(), np.zeros(len(AXES)))
+
+
+def test_reset_starts_a_new_session():
+    history = ProfileHistory(max_steps=2)
+    for i in range(5):
+        history.record(np.full(len(AXES), i, dtype=float))
+    history.reset()
+    history.record(np.full(len(AXES), 7.0))
+    history.record(np.full(len(AXES), 9.0))
+    np.testing.assert_allclose(history.change(), np.full(len(AXES), 2.0))
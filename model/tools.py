@@ -1,9 +1,13 @@
 import json
+import os
+import threading
+from functools import lru_cache
 from pathlib import Path
 import numpy as np
 import pandas as pd
-from typing import Any, Dict, Iterable, List
-import random
+from typing import Dict, Iterable, List
+
+from stopping import DEFAULT_POLICY, ProfileStats, StoppingPolicy, default_policy
 
 # Assuming that all programs have already been embedded to generate interest and skill vectors
 # and that these vectors are available to be picked up 
@@ -56,47 +60,798 @@ def _top2_gap(s: np.ndarray) -> float:
     top2 = np.sort(s)[-2:]  # Get two largest values
     return float(top2[1] - top2[0])  # top1 - top2
 
-# Load microtask bank once at module import
+# Distance metrics supported by nearest_programs / Tools.recommend_programs
+METRICS = ("euclidean", "cosine", "l1")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for the shared microtask bank.
+
+    Still a dict (isinstance checks and json.dumps keep working), but every
+    mutating method raises, so no session can change a task another session
+    is reading.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("microtask bank is read-only, build a new dict instead")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo) -> "FrozenDict":
+        return self
+
+    def __reduce__(self):
+        # rebuild from a plain dict, the default protocol would call the blocked __setitem__
+        return (FrozenDict, (dict(self),))
+
+
+def _freeze(obj):
+    """Recursively turn dicts into FrozenDicts and lists into tuples."""
+    if isinstance(obj, FrozenDict):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+# Data artifacts, loaded lazily on first use (see load_* below)
 # Use absolute path based on project root to avoid working directory issues
 _PROJECT_ROOT = Path(__file__).parent.parent
 _MICROTASKS_PATH = _PROJECT_ROOT / "data" / "microtasks_new.json"
-with open(_MICROTASKS_PATH, "r", encoding="utf-8") as f:
-    MICROTASK_BANK = json.load(f)
+_PROGRAM_VECTORS_PATH = _PROJECT_ROOT / "data" / "processed" / "program_vectors.csv"
+# Typed columnar copy, preferred over the CSV when present
+_PROGRAM_VECTORS_PARQUET = _PROGRAM_VECTORS_PATH.with_suffix(".parquet")
+# Pre-parsed snapshots, keyed by the source file's mtime and size
+_SNAPSHOT_DIR = _PROJECT_ROOT / "data" / ".cache"
 
 RIASEC_dict = {0: 'R', 1: 'I', 2: 'A', 3: 'S', 4: 'E', 5:'C'}
 step = 0.01
 
-test_data = pd.read_csv("data/processed/program_vectors.csv")
-test_data["vector"] = test_data["vector"].str.split('[').str[1]
-test_data["vector"] = test_data["vector"].str.split(']').str[0]
-test_data["vector"] = test_data["vector"].str.split(",")
+
+class ProgramStore:
+    """
+    Read-only program vectors shared by all sessions.
+
+    Vectors are kept as one contiguous float64 matrix (programs x 6 axes) with a
+    name -> row index, so starting a session never copies the program table.
+    Per-session bookkeeping (weights, task_order, asked) lives on Tools and its
+    ProgramScheduler as small arrays indexed by the same rows.
+    """
+
+    def __init__(self, names: Iterable[str], vectors: np.ndarray):
+        self.names = list(names)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float64)
+        self.vectors.setflags(write=False)  # shared between sessions, never mutate
+        self.index: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            self.index.setdefault(name, i)
+        # row norms, precomputed once so distances are a single mat-vec product
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.norms = np.sqrt(self.sq_norms)
+        self.sq_norms.setflags(write=False)
+        self.norms.setflags(write=False)
+        # norm of every axis column over all programs, the per-answer update divides by it
+        self.axis_norms = np.linalg.norm(self.vectors, axis=0)
+        self.axis_norms.setflags(write=False)
+        # dominant axis per program, so RIASEC_test assigns task order with one gather
+        self.argmax_axis = np.argmax(self.vectors, axis=1) if self.vectors.size else np.zeros(0, dtype=np.intp)
+        self.argmax_axis.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def validate(self, atol: float = 1e-3) -> "ProgramStore":
+        """
+        Check that the table is (programs x 6) finite floats with unit-norm rows.
+
+        Raises:
+            ValueError: on an empty table, a wrong shape, NaN/inf entries or
+                vectors that are not L2-normalized within atol
+        """
+        if self.vectors.ndim != 2 or self.vectors.shape[1] != len(AXES) or len(self.vectors) == 0:
+            raise ValueError(f"Program vectors must have shape (n, {len(AXES)}), got {self.vectors.shape}")
+        if len(self.names) != len(self.vectors):
+            raise ValueError(f"{len(self.names)} program names for {len(self.vectors)} vectors")
+        if not np.isfinite(self.vectors).all():
+            raise ValueError("Program vectors contain NaN or inf")
+        off = np.flatnonzero(np.abs(self.norms - 1.0) > atol)
+        if len(off):
+            raise ValueError(
+                f"Program vectors are not L2-normalized, e.g. {self.names[off[0]]!r} has norm {self.norms[off[0]]:.4f}"
+            )
+        return self
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "ProgramStore":
+        """
+        Build the store from a DataFrame with a 'program' (or 'programme_title')
+        column and either six float columns R, I, A, S, E, C or a legacy 'vector'
+        column holding six components (strings or numbers).
+        """
+        name_col = "program" if "program" in frame.columns else "programme_title"
+        if all(axis in frame.columns for axis in AXES):
+            vectors = frame[AXES].to_numpy(dtype=np.float64)
+        else:
+            vectors = np.array([[float(a) for a in vector] for vector in frame["vector"]], dtype=np.float64)
+        return cls(frame[name_col].tolist(), vectors)
+
+    @classmethod
+    def from_csv(cls, path) -> "ProgramStore":
+        """
+        Parse a program vectors CSV once: typed R..C columns, or the legacy
+        layout with vectors stored as "[r, i, a, s, e, c]" strings.
+        """
+        columns = pd.read_csv(path, nrows=0).columns
+        if all(axis in columns for axis in AXES):
+            return cls.from_frame(pd.read_csv(path, dtype={axis: np.float64 for axis in AXES}))
+        frame = pd.read_csv(path)
+        vectors = (
+            frame["vector"].str.strip("[] ")
+            .str.split(",", expand=True)
+            .astype(np.float64)
+            .to_numpy()
+        )
+        return cls(frame["program"].tolist(), vectors)
+
+    @classmethod
+    def from_parquet(cls, path) -> "ProgramStore":
+        """Read a Parquet table with a 'program' column and float64 columns R..C."""
+        return cls.from_frame(pd.read_parquet(path))
+
+    @classmethod
+    def read(cls, path, validate: bool = True) -> "ProgramStore":
+        """Read a .csv or .parquet program vector table and validate it."""
+        path = Path(path)
+        store = cls.from_parquet(path) if path.suffix == ".parquet" else cls.from_csv(path)
+        return store.validate() if validate else store
+
+    def to_frame(self) -> pd.DataFrame:
+        """Typed table: 'program' plus one float64 column per axis."""
+        frame = pd.DataFrame(self.vectors, columns=AXES)
+        frame.insert(0, "program", self.names)
+        return frame
+
+    def save(self, path) -> Path:
+        """
+        Write the typed table as .parquet or .csv (by suffix), e.g. to convert
+        the legacy file: ProgramStore.read("program_vectors.csv").save("program_vectors.parquet")
+        """
+        path = Path(path)
+        frame = self.to_frame()
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        if path.suffix == ".parquet":
+            frame.to_parquet(tmp, index=False)
+        else:
+            frame.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        return path
+
+    def vector(self, program: str) -> np.ndarray:
+        """Return the (read-only) vector of a program."""
+        return self.vectors[self.index[program]]
+
+
+def _unique_ids(ids: np.ndarray) -> np.ndarray:
+    """Drop repeated task ids, keeping the first occurrence order."""
+    _, first = np.unique(ids, return_index=True)
+    return ids[np.sort(first)]
+
+
+class MicrotaskIndex:
+    """
+    Candidate index over the microtask bank, built once at load time.
+
+    All tasks live in one flat table (self.tasks) and every candidate pool is a
+    read-only integer array of task ids:
+        (program, "broad")   -> broad exploration tasks
+        (program, axis)      -> tasks targeting one RIASEC axis
+        (program, (a1, a2))  -> top-2 disambiguation tasks (a1 tasks, then a2)
+    Drawing a task is a single integer draw; tasks a session has already seen
+    are skipped via a boolean mask over task ids, the pools are never copied.
+    Tasks are frozen (see FrozenDict) and shared by every session. A task listed
+    in several pools (same question_code, or the same task object) has one id in
+    all of them, so a seen mask never lets a question repeat.
+
+    An index is never modified once built: extended() returns a new index in
+    which existing task ids keep their meaning and new tasks get new ids.
+    """
+
+    _EMPTY = np.empty(0, dtype=np.intp)
+
+    def __init__(self, bank: Dict[str, Dict[str, List[dict]]]):
+        self.tasks: List[dict] = []
+        self.pools: Dict[tuple, np.ndarray] = {}
+        self._codes: Dict[str, int] = {}  # question_code -> task id
+        self._add(bank)
+
+    def extended(self, bank: Dict[str, Dict[str, List[dict]]]) -> "MicrotaskIndex":
+        """New index with the tasks of `bank` appended to the matching pools."""
+        index = MicrotaskIndex({})
+        index.tasks = list(self.tasks)
+        index.pools = dict(self.pools)
+        index._codes = dict(self._codes)
+        index._add(bank)
+        return index
+
+    def _task_id(self, task: dict, objects: Dict[int, int]) -> int:
+        # objects: id(task) -> task id for tasks without a question_code, valid during one _add
+        code = task.get("question_code")
+        known = self._codes.get(code) if code is not None else objects.get(id(task))
+        if known is not None:
+            return known
+        task_id = len(self.tasks)
+        self.tasks.append(_freeze(task))
+        if code is not None:
+            self._codes[code] = task_id
+        else:
+            objects[id(task)] = task_id
+        return task_id
+
+    def _add(self, bank: Dict[str, Dict[str, List[dict]]]):
+        objects: Dict[int, int] = {}
+        for program, program_pools in bank.items():
+            for key, tasks in program_pools.items():
+                ids = np.array([self._task_id(task, objects) for task in tasks], dtype=np.intp)
+                ids = _unique_ids(np.concatenate([self.pool(program, key), ids]))
+                ids.setflags(write=False)
+                self.pools[(program, key)] = ids
+
+            for first in AXES:
+                for second in AXES:
+                    if first == second:
+                        continue
+                    # a task in both axis pools is listed once
+                    ids = _unique_ids(np.concatenate([self.pool(program, first), self.pool(program, second)]))
+                    ids.setflags(write=False)
+                    self.pools[(program, (first, second))] = ids
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def pool(self, program: str, key) -> np.ndarray:
+        """Task ids for (program, key); empty when the bank has none."""
+        return self.pools.get((program, key), self._EMPTY)
+
+    def draw(
+        self,
+        pool: np.ndarray,
+        rng: np.random.Generator,
+        seen: np.ndarray | None = None,
+        max_tries: int = 8
+    ) -> int:
+        """
+        Draw one task id from the pool, avoiding ids marked in `seen`.
+
+        A few rejection draws cover the common case; only when those keep hitting
+        seen tasks are the remaining ids collected. If every task in the pool was
+        seen, repeats are allowed again.
+        """
+        if len(pool) == 0:
+            raise ValueError("No microtasks to choose from")
+        if seen is None:
+            return int(pool[rng.integers(len(pool))])
+
+        for _ in range(max_tries):
+            task_id = int(pool[rng.integers(len(pool))])
+            if not seen[task_id]:
+                return task_id
+
+        unseen = pool[~seen[pool]]
+        if len(unseen) == 0:
+            return int(pool[rng.integers(len(pool))])
+        return int(unseen[rng.integers(len(unseen))])
+
+
+class ProgramScheduler:
+    """
+    Picks the next program to ask about for one session.
+
+    Programs sit in buckets by task_order (0..max_order), one set of buckets for
+    unasked and one for asked programs. A bucket is a list plus each program's
+    position in it, so moving a program between buckets, drawing a random member
+    and marking it asked are O(1); finding the lowest non-empty bucket looks at
+    no more than max_order + 1 buckets. task_order and asked are plain arrays
+    kept in sync with the buckets; change them only through this class.
+    """
+
+    def __init__(self, task_order: np.ndarray, rng: np.random.Generator, max_order: int = 6):
+        self.max_order = max_order
+        self.rng = rng
+        self.task_order = np.zeros(len(task_order), dtype=np.int64)
+        self.asked = np.zeros(len(task_order), dtype=bool)
+        self.reset(task_order)
+
+    def reset(self, task_order: np.ndarray):
+        """Start over with new task orders and nothing asked."""
+        self.task_order[:] = np.clip(task_order, 0, self.max_order)
+        self.asked[:] = False
+        self._n_unasked = len(self.task_order)
+        # buckets[asked][order] -> program rows; _pos[i] = position of i in its bucket
+        self._buckets = ([[] for _ in range(self.max_order + 1)], [[] for _ in range(self.max_order + 1)])
+        self._pos = [0] * len(self.task_order)
+        for order in range(self.max_order + 1):
+            rows = np.flatnonzero(self.task_order == order).tolist()
+            self._buckets[0][order] = rows
+            for p, i in enumerate(rows):
+                self._pos[i] = p
+
+    def _bucket(self, i: int) -> list:
+        return self._buckets[int(self.asked[i])][self.task_order[i]]
+
+    def _remove(self, i: int):
+        # swap with the last member so removal stays O(1)
+        bucket = self._bucket(i)
+        last = bucket.pop()
+        if last != i:
+            bucket[self._pos[i]] = last
+            self._pos[last] = self._pos[i]
+
+    def _add(self, i: int):
+        bucket = self._bucket(i)
+        self._pos[i] = len(bucket)
+        bucket.append(i)
+
+    def adjust(self, i: int, delta: int):
+        """Move program i by delta in task order, clipped to 0..max_order."""
+        order = min(self.max_order, max(0, int(self.task_order[i]) + delta))
+        if order != self.task_order[i]:
+            self._remove(i)
+            self.task_order[i] = order
+            self._add(i)
+
+    def mark_asked(self, i: int):
+        if not self.asked[i]:
+            self._remove(i)
+            self.asked[i] = True
+            self._n_unasked -= 1
+            self._add(i)
+
+    def next(self) -> int:
+        """
+        Random program among those with the lowest task order, unasked programs
+        first (all programs once every one was asked); marks it asked.
+        """
+        for bucket in self._buckets[0 if self._n_unasked else 1]:
+            if bucket:
+                i = bucket[int(self.rng.integers(len(bucket)))]
+                self.mark_asked(i)
+                return i
+        raise ValueError("No programs to schedule")
+
+
+def nearest_programs(
+    store: ProgramStore,
+    student_vector,
+    k: int = 3,
+    metric: str = "euclidean"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k programs closest to the student vector.
+
+    All distances are computed in one matrix operation against the store and
+    only the k best are sorted (np.argpartition), so the cost stays linear in
+    the number of programs.
+
+    Args:
+        store: Program store to search
+        student_vector: 6D RIASEC vector (R, I, A, S, E, C)
+        k: Number of programs to return (capped at the number of programs)
+        metric: "euclidean", "cosine" (1 - cosine similarity) or "l1"
+
+    Returns:
+        tuple: (row indices into the store, distances), both ordered nearest first
+    """
+    s = np.asarray(student_vector, dtype=np.float64)
+    vectors = store.vectors
+
+    if metric == "euclidean":
+        # ||p - s||^2 = ||p||^2 - 2 p.s + ||s||^2
+        distances = np.sqrt(np.maximum(store.sq_norms - 2.0 * (vectors @ s) + s @ s, 0.0))
+    elif metric == "cosine":
+        distances = 1.0 - (vectors @ s) / np.maximum(store.norms * np.linalg.norm(s), 1e-12)
+    elif metric == "l1":
+        distances = np.abs(vectors - s).sum(axis=1)
+    else:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}")
+
+    k = min(int(k), len(distances))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    if k < len(distances):
+        top = np.argpartition(distances, k - 1)[:k]
+    else:
+        top = np.arange(len(distances))
+    top = top[np.argsort(distances[top], kind="stable")]
+
+    return top, distances[top]
+
+
+def apply_answers_batch(
+    store: ProgramStore,
+    student_vectors,
+    task_answers,
+    programs=None,
+    scaling_factors=0.15,
+    epsilon: float = 10e-6
+) -> np.ndarray:
+    """
+    Student vector update of update_student_vectors_batch without the stopping
+    check, for callers that compute the step's ProfileStats themselves.
+
+    Returns:
+        np.ndarray: updated N x 6 vectors (the input is not modified)
+    """
+    S = np.array(student_vectors, dtype=np.float64, ndmin=2)  # copy, input stays untouched
+    n = len(S)
+    rows = np.arange(n)
+    answers = np.asarray(task_answers, dtype=np.intp)
+    scaling = np.broadcast_to(np.asarray(scaling_factors, dtype=np.float64), (n,))
+
+    importance_norms = store.axis_norms
+
+    # RIASEC test answers move by the full scaling factor, microtask answers
+    # by the answered program's component on that axis
+    component = np.ones(n)
+    if programs is not None:
+        programs = np.asarray(programs, dtype=np.intp)
+        has_program = programs >= 0
+        component[has_program] = store.vectors[programs[has_program], answers[has_program]]
+
+    S[rows, answers] += scaling * component / (importance_norms[answers] + epsilon)
+    S /= np.linalg.norm(S, axis=1, keepdims=True)
+    return S
+
+
+def update_student_vectors_batch(
+    store: ProgramStore,
+    student_vectors,
+    task_answers,
+    programs=None,
+    scaling_factors=0.15,
+    entropy_threshold: float = 1.20,
+    gap_threshold: float = 0.15,
+    epsilon: float = 10e-6,
+    policy: StoppingPolicy | None = None,
+    steps=0
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Apply one answer to each of N sessions at once.
+
+    Batched counterpart of Tools.update_student_vectors + check_stopping_point:
+    every row gets the same update, L2 normalization, entropy and top-2 gap
+    stopping check, computed with whole-array operations.
+
+    Args:
+        store: Program store the sessions are profiled against
+        student_vectors: N x 6 student matrix (not modified)
+        task_answers: N answered RIASEC axis indices (0-5)
+        programs: N program row indices into the store, -1 for RIASEC test
+            answers (no program); None means all RIASEC test answers
+        scaling_factors: scalar or N scaling factors
+        entropy_threshold: Max entropy to stop profiling (default: 1.20)
+        gap_threshold: Min gap between top-2 to stop (default: 0.15)
+        epsilon: Added to the importance norm, as Tools.epsilon
+        policy: Stopping policy; default: entropy_threshold OR gap_threshold
+        steps: scalar or N answer counts after this answer, for step-based policies
+
+    Returns:
+        tuple: (updated N x 6 vectors, stop mask, entropies, top-2 gaps)
+    """
+    S = apply_answers_batch(store, student_vectors, task_answers, programs, scaling_factors, epsilon)
+
+    # stopping statistics on the L1-normalized profile, computed once for all rows
+    stats = ProfileStats(S, steps)
+    if policy is None:
+        policy = default_policy(entropy_threshold, gap_threshold)
+
+    return S, policy(stats), stats.entropy, stats.gap
+
+
+def select_microtask(
+    microtasks: MicrotaskIndex,
+    student_vector,
+    program: str,
+    rng: np.random.Generator,
+    seen: np.ndarray | None = None,
+    verify_gap_threshold: float = 0.12,
+    stats: ProfileStats | None = None
+) -> dict:
+    """
+    Pick a microtask for `program` from the index, see Tools.fetch_microtask.
+
+    Session state is passed in: `rng` draws the task and `seen` (a boolean mask
+    over task ids, at least len(microtasks) long) is skipped and updated in place.
+    `stats` are the step's ProfileStats of student_vector when already computed.
+    """
+    if stats is None:
+        stats = ProfileStats(student_vector)
+
+    # Top-1 vs Top-2
+    top_idx, second_idx = stats.order[0, 0], stats.order[0, 1]
+    gap = float(stats.gap[0])
+    
+    # Decide: broad exploration or targeted disambiguation
+    if gap < verify_gap_threshold:
+        # High uncertainty → use broad tasks
+        candidates = microtasks.pool(program, "broad")
+        policy = "broad_exploration"
+        target_axes = ["all"]
+    else:
+        # Low uncertainty → disambiguate top1 vs top2
+        target_axes = [AXES[top_idx], AXES[second_idx]]
+        policy = "disambiguate_top2"
+        candidates = microtasks.pool(program, (AXES[top_idx], AXES[second_idx]))
+
+    if len(candidates) == 0:
+        raise ValueError(f"No {policy} microtasks for program {program!r}")
+
+    # Select random task from the precomputed candidate ids
+    task_id = microtasks.draw(candidates, rng, seen=seen)
+    if seen is not None:
+        seen[task_id] = True
+    task = microtasks.tasks[task_id]
+    
+    # Add metadata for debugging/analytics. "meta" is a dictionary that stores diagnostic information about why this task was selected
+    # The bank task is shared and frozen: the response is a new top-level dict
+    # with its own meta, nested fields (question, options, ...) are shared as-is
+    meta = dict(task.get("meta", {}))
+    meta.update({
+        "program": program,         # Program the task was fetched for
+        "task_id": task_id,         # Row in the microtask index
+        "policy": policy,           # "broad_exploration" or "disambiguate_top2"
+        "target_axes": target_axes, # Which RIASEC axes this task targets
+        "top2_gap": gap,            # Gap between top-1 and top-2 (decision metric)
+        "entropy": float(stats.entropy[0]),  # Current profile uncertainty
+    })
+    return {**task, "meta": meta}
+
+
+def is_stopping_point(
+    student_vector,
+    entropy_threshold: float = 1.20,
+    gap_threshold: float = 0.15,
+    policy: StoppingPolicy | None = None,
+    steps: int = 0
+) -> bool:
+    """
+    Stopping rule of Tools.check_stopping_point for any student vector:
+    `policy` when given, else entropy < entropy_threshold OR gap > gap_threshold.
+    """
+    if policy is None:
+        policy = default_policy(entropy_threshold, gap_threshold)
+    return policy.stop(ProfileStats(student_vector, steps))
+
+
+def recommend(store: ProgramStore, student_vector, k: int = 3, metric: str = "euclidean") -> list[dict]:
+    """Recommendations of Tools.recommend_programs for any student vector."""
+    student_vector = np.asarray(student_vector, dtype=float)
+    top, distances = nearest_programs(store, student_vector, k=k, metric=metric)
+
+    # explanation only needs the difference vectors of the recommended programs
+    distance_vectors = store.vectors[top] - student_vector
+
+    recommendations = []
+    for i, distance, distance_vector in zip(top, distances, distance_vectors):
+        least_distance_index = int(np.argmin(distance_vector))
+        recommendations.append({
+            "program": store.names[i],
+            "distance": round(float(distance), 4),
+            "least_distance": round(float(distance_vector[least_distance_index]), 4),
+            "highest_profile": RIASEC_dict[least_distance_index]
+            })
+
+    return recommendations
+
+
+def _snapshot_key(path: Path) -> str:
+    """Snapshot file stem that changes whenever the source file changes."""
+    stat = path.stat()
+    return f"{path.name}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+@lru_cache(maxsize=None)
+def load_program_store(path: Path | None = None, snapshot: bool = True) -> ProgramStore:
+    """
+    Load the program vector table once per process.
+
+    By default data/processed/program_vectors.parquet is read when it exists,
+    program_vectors.csv otherwise (typed R..C columns or the legacy "[...]"
+    strings). Shape, finiteness and unit norms are validated on every load.
+
+    With snapshot=True the parsed vectors are also kept as <key>.npy plus a
+    <key>.json list of names in data/.cache, so later processes skip the
+    parse. Snapshots are keyed by the source file's mtime and size; if the
+    cache directory is not writable the file is simply parsed every cold start.
+    """
+    if path is None:
+        path = _PROGRAM_VECTORS_PARQUET if _PROGRAM_VECTORS_PARQUET.exists() else _PROGRAM_VECTORS_PATH
+    path = Path(path)
+    if not snapshot:
+        return ProgramStore.read(path)
+
+    key = _snapshot_key(path)
+    vectors_path = _SNAPSHOT_DIR / f"{key}.npy"
+    names_path = _SNAPSHOT_DIR / f"{key}.json"
+    if vectors_path.exists() and names_path.exists():
+        with open(names_path, "r", encoding="utf-8") as f:
+            names = json.load(f)
+        return ProgramStore(names, np.load(vectors_path)).validate()
+
+    store = ProgramStore.read(path)
+    try:
+        _SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        for stale in _SNAPSHOT_DIR.glob(f"{path.name}-*"):
+            if stale.suffix in (".npy", ".json") and stale.stem != key:
+                stale.unlink(missing_ok=True)
+        # write to temporary files and rename, so concurrent readers never see partial files
+        tmp = f".{os.getpid()}.tmp"
+        with open(vectors_path.with_name(vectors_path.name + tmp), "wb") as f:
+            np.save(f, store.vectors)
+        with open(names_path.with_name(names_path.name + tmp), "w", encoding="utf-8") as f:
+            json.dump(store.names, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(vectors_path.with_name(vectors_path.name + tmp), vectors_path)
+        os.replace(names_path.with_name(names_path.name + tmp), names_path)
+    except OSError:
+        pass
+    return store
+
+
+@lru_cache(maxsize=None)
+def load_microtask_bank(path: Path = _MICROTASKS_PATH) -> FrozenDict:
+    """Load and freeze the microtask bank once per process."""
+    with open(path, "r", encoding="utf-8") as f:
+        return _freeze(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def load_microtask_index(path: Path = _MICROTASKS_PATH) -> MicrotaskIndex:
+    """Candidate index over the microtask bank, built once per process."""
+    return MicrotaskIndex(load_microtask_bank(path))
+
+
+# Index with tasks published at runtime (e.g. by bank_prefiller); None until the first publish
+_published_index: MicrotaskIndex | None = None
+_publish_lock = threading.Lock()
+
+
+def current_microtask_index() -> MicrotaskIndex:
+    """The microtask index sessions draw from: the file bank plus published tasks."""
+    index = _published_index
+    return index if index is not None else load_microtask_index()
+
+
+def publish_microtasks(bank: Dict[str, Dict[str, List[dict]]]) -> MicrotaskIndex:
+    """
+    Add tasks ({program: {pool key: [task, ...]}}) to the live index.
+
+    A new index is built next to the current one and swapped in with a single
+    assignment, so concurrent sessions see either all new tasks or none.
+    """
+    global _published_index
+    with _publish_lock:
+        _published_index = current_microtask_index().extended(bank)
+        return _published_index
+
+
+# Module-level names kept for existing imports; resolved on first access
+_LAZY_GLOBALS = {
+    "PROGRAM_STORE": load_program_store,
+    "MICROTASK_BANK": load_microtask_bank,
+    "MICROTASK_INDEX": current_microtask_index,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_GLOBALS:
+        return _LAZY_GLOBALS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class ProfileHistory:
+    """
+    Fixed-size record of a session's student vectors.
+
+    Snapshots are copied into a preallocated (max_steps x 6) ring buffer, so
+    memory per session is fixed and later in-place updates of the student
+    vector never change recorded entries. Once more than max_steps vectors are
+    recorded the oldest are overwritten; `steps` keeps counting all of them and
+    the session's first vector is kept apart, so change() always measures from
+    the start of the session.
+    """
+
+    def __init__(self, max_steps: int = 64, dtype=np.float32):
+        self.max_steps = max_steps
+        self._buffer = np.zeros((max_steps, len(AXES)), dtype=dtype)
+        self._first = np.zeros(len(AXES), dtype=dtype)
+        self.steps = 0
+
+    def record(self, student_vector):
+        """Store a copy of the vector as the next step."""
+        if self.steps == 0:
+            self._first[:] = student_vector
+        self._buffer[self.steps % self.max_steps] = student_vector
+        self.steps += 1
+
+    # list-style name, kept for existing callers
+    append = record
+
+    def reset(self):
+        self.steps = 0
+
+    def __len__(self) -> int:
+        return min(self.steps, self.max_steps)
+
+    def trajectory(self) -> np.ndarray:
+        """Recorded vectors, oldest first, as a new (len(self) x 6) array."""
+        if self.steps <= self.max_steps:
+            return self._buffer[:self.steps].copy()
+        head = self.steps % self.max_steps
+        return np.concatenate([self._buffer[head:], self._buffer[:head]])
+
+    def __getitem__(self, i):
+        return self.trajectory()[i]
+
+    def __iter__(self):
+        return iter(self.trajectory())
+
+    def change(self) -> np.ndarray:
+        """Per-axis change from the session's first to the newest recorded vector."""
+        if self.steps < 2:
+            return np.zeros(len(AXES))
+        newest = self._buffer[(self.steps - 1) % self.max_steps]
+        return (newest - self._first).astype(np.float64)
 
 
 class Tools:
 
-    def __init__(self, RIASEC_dict=None, step=None, all_programs=None):
-        self.program_vectors = pd.DataFrame(columns=['program', 'vector'])
+    def __init__(self, RIASEC_dict=None, step=None, all_programs=None, seed: int | None = None,
+                 stopping_policy: StoppingPolicy | None = None):
         self.student_vector = np.ones(6) / np.sqrt(6)  # Initialize to uniform distribution
-        self.all_student_vectors = [] # to hold the history of all student vectors so far
+        self.all_student_vectors = ProfileHistory() # history of the student vectors so far (fixed size)
+        self.answers = 0  # answers applied so far, the RIASEC test counts as one
+        # when to stop profiling, see stopping.py; statistics are computed once per step
+        self.stopping_policy = stopping_policy if stopping_policy is not None else DEFAULT_POLICY
+        self._stats = None
+        self._stats_vector = None
         # Use module-level defaults if not provided
         self.RIASEC_dict = RIASEC_dict if RIASEC_dict is not None else globals()['RIASEC_dict']
         self.step = step if step is not None else globals()['step']
-        self.all_programs = all_programs if all_programs is not None else test_data
+        # Shared program store; a DataFrame with 'program' and R..C (or legacy 'vector') columns is still accepted
+        if all_programs is None:
+            all_programs = load_program_store()
+        elif not isinstance(all_programs, ProgramStore):
+            all_programs = ProgramStore.from_frame(all_programs)
+        self.all_programs = all_programs
         self.epsilon = 10e-6
+        # one generator per session (program scheduling and microtask draws), fresh
+        # entropy unless a seed is given (simulations, tests); and the task ids the
+        # session has already seen
+        self.rng = np.random.default_rng(seed)
+        self.seen_tasks = np.zeros(len(self.microtasks), dtype=bool)
         
 
+    @property
+    def microtasks(self) -> MicrotaskIndex:
+        """Live microtask index; picks up tasks published while the session runs."""
+        return current_microtask_index()
+
     def eligible_programs(self, hs_profile: str) -> list[str]:
         """
         Returns a list of all eligible programs based on HS profile.
         
         TODO: Implement actual filtering logic based on hs_profile.
-        For now, return all programs present in the program vectors data.
+        For now, return all programs present in the program store.
         """
-        program_data = pd.read_csv("data/processed/program_vectors.csv")
-
-        programs = program_data["program"].unique().tolist()
-
-        self.programs_set = programs
+        self.programs_set = self.all_programs.names
 
         return self.programs_set
 
@@ -109,15 +864,11 @@ class Tools:
         
         # TODO: remove hardcoded vector and retreive correct vector based on avatar
         # currently initialized as a trivially normalized vector
-        self.student_vector = [0.4082, 0.4082, 0.4082, 0.4082, 0.4082, 0.4082]
+        self.student_vector = np.array([0.4082, 0.4082, 0.4082, 0.4082, 0.4082, 0.4082])
     
 
     def fetch_program_vector(self, program):
-        all_programs = self.all_programs.copy()
-        index = all_programs.loc[all_programs["program"] == program].index
-        vector = self.all_programs.iloc[index]["vector"]
-        
-        return vector
+        return self.all_programs.vector(program)
 
     def initiate_student_vectors(self, avatar_chosen=None, demo=None):
         """
@@ -133,40 +884,23 @@ class Tools:
         
         self.avatar = avatar_chosen
         self.get_avatar_embedding()
-        self.start_student_vector = self.student_vector
-        self.all_student_vectors.append(self.student_vector)
+        self.start_student_vector = self.student_vector.copy()
+        self.all_student_vectors.record(self.student_vector)
 
         self.eligible_programs(demo["hs_profile"])
 
-        gradient = np.zeros((len(self.programs_set), 6))
-
-
-        for program in self.programs_set:
-            program_vector = self.fetch_program_vector(program)
-            i = self.programs_set.index(program)
-
-            for j in range(0, 6):
-                gradient[i, j] = program_vector.iloc[0][j]
-
-            vector_dict = {
-            "program": program, 
-            "vector": program_vector
-            }
-
-            vector_df = pd.DataFrame(vector_dict)
-
-            self.program_vectors = pd.concat([self.program_vectors, vector_df], ignore_index=True)
-
-        self.gradient = gradient
+        # program vectors are shared and read-only, only the bookkeeping arrays are per session
+        self.gradient = self.all_programs.vectors
 
+        n_programs = len(self.programs_set)
 
         #TODO: how to iniate weights of these vectors
-        self.program_vectors["weights"] = 0
-        self.program_vectors["task_order"] = 0
-        self.program_vectors["asked"] = 0 
-        
+        self.weights = np.zeros(n_programs)
+        self.scheduler = ProgramScheduler(np.zeros(n_programs, dtype=np.int64), self.rng)
+        # read-only views, updated through the scheduler
+        self.task_order = self.scheduler.task_order
+        self.asked = self.scheduler.asked
 
-        
 
     def RIASEC_test(self, student_choice, scaling_factor=0.15):
         """
@@ -180,44 +914,16 @@ class Tools:
 
         # start with the (ranked list) student_choice ['R': 2, 'I': 5, 'A': 3, 'S': 1, 'E': 6, 'C': 4]
 
-        RIASEC = ['R', 'I', 'A', 'S', 'E', 'C']
+        # rank of each axis, in AXES order: rank[axis] = 1 for the first preference ... 6 for the last
+        if sorted(student_choice) != sorted(AXES):
+            raise ValueError(f"student_choice must rank each of {AXES} once, got {student_choice!r}")
+        rank = np.empty(len(AXES), dtype=np.int64)
+        rank[[AXES.index(axis) for axis in student_choice]] = np.arange(1, len(AXES) + 1)
+        first_preference = AXES.index(student_choice[0])
 
-        student_choice_dict = {}
+        # task order of every program is the rank of its dominant axis
+        self.scheduler.reset(rank[self.all_programs.argmax_axis])
 
-        for val in RIASEC:
-            student_choice_dict[val] = student_choice.index(val) + 1
-        
-        ranked_list = list(student_choice_dict.values())
-        
-        first_preference = ranked_list.index(1)
-        second_preference = ranked_list.index(2)
-        third_preference = ranked_list.index(3)
-        fourth_preference = ranked_list.index(4)
-        fifth_preference = ranked_list.index(5)
-        sixth_preference = ranked_list.index(6)
-
-        first_preference_RIASEC = RIASEC[first_preference]
-        second_preference_RIASEC = RIASEC[second_preference]
-        
-        
-        for i, row in self.program_vectors.iterrows():
-            
-            max_value = max(row["vector"])
-
-            if row["vector"].index(max_value ) == first_preference:
-                self.program_vectors.loc[i, "task_order"] = 1
-            elif row["vector"].index(max_value ) == second_preference:
-                self.program_vectors.loc[i, "task_order"] = 2 
-            elif row["vector"].index(max_value ) == third_preference:
-                self.program_vectors.loc[i, "task_order"] = 3 
-            elif row["vector"].index(max_value ) == fourth_preference:
-                self.program_vectors.loc[i, "task_order"] = 4 
-            elif row["vector"].index(max_value ) == fifth_preference:
-                self.program_vectors.loc[i, "task_order"] = 5
-            else:
-                self.program_vectors[i, "task_order"] = 6         
-
-       
         return self.update_student_vectors(task_answer=int(first_preference), scaling_factor=scaling_factor)
 
             
@@ -226,7 +932,8 @@ class Tools:
         student_vector,
         program: str,
         verify_gap_threshold: float = 0.12,
-        rng: np.random.Generator | None = None
+        rng: np.random.Generator | None = None,
+        exclude_seen: bool = True
     ) -> dict:
         """
         Fetch microtask from bank based on student profile clarity.
@@ -240,56 +947,36 @@ class Tools:
             student_vector: 6D RIASEC vector (R, I, A, S, E, C)
             program: Program name (e.g., "Mathematics", "Nursing")
             verify_gap_threshold: Gap threshold for broad vs targeted (default: 0.12)
-            rng: Random number generator for task selection (default: seeded RNG)
+            rng: Random number generator for task selection (default: session RNG)
+            exclude_seen: Skip tasks this session has already been given (default: True)
         
         Returns:
             dict: Microtask with 'question', 'options', and 'meta' fields
         """
         if rng is None:
-            rng = np.random.default_rng(42)
-        
-        # Normalize student vector
-        s = _l1(np.asarray(student_vector, dtype=float))
-        
-        # Top-1 vs Top-2
-        order = np.argsort(-s)
-        top_idx, second_idx = order[0], order[1]
-        gap = float(s[top_idx] - s[second_idx])
-        
-        prog_pool = MICROTASK_BANK.get(program, {})
-        # generic_pool = MICROTASK_BANK.get("_generic_", {})
-        
-        # Decide: broad exploration or targeted disambiguation
-        if gap < verify_gap_threshold:
-            # High uncertainty → use broad tasks
-            candidates = prog_pool.get("broad", [])
-            # + generic_pool.get("broad", [])
-            policy = "broad_exploration"
-            target_axes = ["all"]
-        else:
-            # Low uncertainty → disambiguate top1 vs top2
-            target_axes = [AXES[top_idx], AXES[second_idx]]
-            policy = "disambiguate_top2"
-            candidates = []
-            for axis in target_axes:
-                candidates += prog_pool.get(axis, [])
-                # candidates += generic_pool.get(axis, [])
-        
-        # return prog_pool, candidates, program
-        # Select random task from candidates
-        task = rng.choice(candidates)
+            rng = self.rng
         
-        # Add metadata for debugging/analytics. "meta" is a dictionary that stores diagnostic information about why this task was selected
-        task.setdefault("meta", {})  # Ensure "meta" dict exists. 
-        task["meta"].update({
-            "policy": policy,           # "broad_exploration" or "disambiguate_top2"
-            "target_axes": target_axes, # Which RIASEC axes this task targets
-            "top2_gap": gap,            # Gap between top-1 and top-2 (decision metric)
-            "entropy": _entropy(s),     # Current profile uncertainty
-        })
-        return task
+        microtasks = self.microtasks  # one index for the whole call
+        if len(self.seen_tasks) < len(microtasks):
+            # tasks were published since the last call, existing ids are unchanged
+            self.seen_tasks = np.concatenate(
+                [self.seen_tasks, np.zeros(len(microtasks) - len(self.seen_tasks), dtype=bool)]
+            )
+        return select_microtask(
+            microtasks, student_vector, program, rng,
+            seen=self.seen_tasks if exclude_seen else None,
+            verify_gap_threshold=verify_gap_threshold,
+            stats=self.profile_stats() if student_vector is self.student_vector else None,
+        )
 
 
+    def profile_stats(self) -> ProfileStats:
+        """Statistics of the current student vector, computed once per step."""
+        if self._stats is None or self._stats_vector is not self.student_vector:
+            self._stats = ProfileStats(self.student_vector, steps=self.answers)
+            self._stats_vector = self.student_vector
+        return self._stats
+
     def normalize(self):
         norm = np.linalg.norm(self.student_vector)
         self.student_vector = self.student_vector/norm
@@ -303,13 +990,11 @@ class Tools:
         """
 
         profile_preference = self.RIASEC_dict[task_answer]
-        importance_vector = self.gradient[:, task_answer]
-        importance_vector_norm = np.linalg.norm(importance_vector)
+        # precomputed per axis when the program store loads
+        importance_vector_norm = self.all_programs.axis_norms[task_answer]
 
         if program is not None:
-            program_vector = self.program_vectors[self.program_vectors["program"] == program]["vector"]
-            # program_vector = program_vector.iloc[0]
-            program_vector_component = program_vector.iloc[0][task_answer]
+            program_vector_component = self.gradient[self.all_programs.index[program], task_answer]
         else:
             profile_preference = None
 
@@ -323,118 +1008,85 @@ class Tools:
 
         
         self.normalize()
-        self.all_student_vectors.append(self.student_vector)
+        self.all_student_vectors.record(self.student_vector)
+        self.answers += 1
+        self._stats = None
         
         
         # micro-task order updation
         if task_preference is not None:
             if program is not None:
+                i = self.all_programs.index[program]
                 if task_preference == "positive":
-                    self.program_vectors.loc[self.program_vectors['program'] == program, "task_order"] = \
-                    max(0, self.program_vectors.loc[self.program_vectors['program'] == program,"task_order"].item() - 1)
+                    self.scheduler.adjust(i, -1)
                 elif task_preference == "negative":
-                    self.program_vectors.loc[self.program_vectors['program'] == program, "task_order"] = \
-                    min(6, self.program_vectors.loc[self.program_vectors['program'] == program, "task_order"].item() + 1)
+                    self.scheduler.adjust(i, +1)
 
 
 
         if self.check_stopping_point():
             return self.recommend_programs()
         else:
-            # filter out programs that have not yet been asked
+            # lowest task order (highest student preference) among the programs not asked yet,
+            # ties broken with the session rng; the program is marked as asked
             #TODO: check when we ask across unasked questions (broad) and when we narrow down to specific asked tasks
-            if 0 in self.program_vectors["asked"].unique():
-                programs = self.program_vectors.loc[self.program_vectors["asked"] == 0]
-                
-                min_task_order = programs["task_order"].min()
-                # filter out programs that has lowest task order (highest student preference)
-                programs = programs.loc[(programs["task_order"] == min_task_order)]["program"].unique()
-                
-                # Randomly choose a program having the lowest task order and update the programs_vector
-                program = random.choice(list(programs))
-                
-                self.program_vectors.loc[self.program_vectors["program"] == program, "asked"] = 1
-                
-                
-                #fetch the microtask for the chosen program
-                return self.fetch_microtask(program=program, student_vector=self.student_vector)
-            else:
-                min_task_order = self.program_vectors["task_order"].min()
-                # filter out programs that has lowest task order (highest student preference)
-                programs = self.program_vectors.loc[(programs["task_order"] == min_task_order)]["program"].unique()
-
-                # Randomly choose a program having the lowest task order and update the programs_vector
-                program = random.choice(list(programs))
-                self.program_vectors.loc[self.program_vectors["program"] == program, "asked"] = 1
-
-                
-                #fetch the microtask for the chosen program
-                return self.fetch_microtask(program=program, student_vector=self.student_vector)    
-            
-            
+            i = self.scheduler.next()
+            program = self.programs_set[i]
+
+            #fetch the microtask for the chosen program
+            return self.fetch_microtask(program=program, student_vector=self.student_vector)
+
+
     def check_stopping_point(
         self,
-        entropy_threshold: float = 1.20,
-        gap_threshold: float = 0.15
+        entropy_threshold: float | None = None,
+        gap_threshold: float | None = None
     ) -> bool:
         """
         Check if student profiling has reached stopping point.
         
-        Stops when profile is confident (OR logic):
+        Evaluates self.stopping_policy on the step's ProfileStats. The default
+        policy stops when profile is confident (OR logic):
         - Shannon entropy < threshold (concentrated profile)
         - Top-1 vs top-2 gap > threshold (clear dominant axis)
         
         Args:
-            student_vector: 6D RIASEC vector (R, I, A, S, E, C)
             entropy_threshold: Max entropy to stop profiling (default: 1.20)
             gap_threshold: Min gap between top-2 to stop (default: 0.15)
+            Passing either threshold uses that entropy/gap rule instead of
+            self.stopping_policy.
         
         Returns:
             bool: True if profiling should stop, False to continue
         """
-        s = _l1(np.asarray(self.student_vector, dtype=float))
-        return (_entropy(s) < entropy_threshold) or (_top2_gap(s) > gap_threshold)
+        policy = self.stopping_policy
+        if entropy_threshold is not None or gap_threshold is not None:
+            policy = default_policy(
+                1.20 if entropy_threshold is None else entropy_threshold,
+                0.15 if gap_threshold is None else gap_threshold,
+            )
+        return policy.stop(self.profile_stats())
 
 
-    def recommend_programs(self):
+    def recommend_programs(self, k: int = 3, metric: str = "euclidean"):
         """
-        Find 3 nearest neighbors to the student vector from the program set
+        Find k nearest neighbors (default 3) to the student vector from the program set
         Return an ordered list of dictionaries
         {'program', 'recommendation_order', 'explanation'}
         explanation consists of if the student enjoyed the microtask presented for this program, 
         which student personlities have increased with tasks has evolved with the microtasks
+
+        Args:
+            k: Number of programs to recommend
+            metric: Distance metric, one of "euclidean", "cosine", "l1"
         """
 
-        self.program_vectors["distance"] = 0
-        self.program_vectors["distance_vector"] = self.program_vectors["vector"]
-        for i, row in self.program_vectors.iterrows():
-            program_vector = [float(a) for a in row["vector"]]
-            distance_vector = np.asarray(program_vector) - np.asarray(self.student_vector)
-            distance = np.linalg.norm(distance_vector)
-            self.program_vectors["distance"][i] = distance
-            self.program_vectors["distance_vector"][i] = distance_vector
-        
-        distances = self.program_vectors.copy()
-        distances["least_distance"] = distances["distance_vector"].apply(lambda x: min(x))
-        distances["least_distance_index"] = distances["distance_vector"].apply(lambda x: np.argmin(x))
-        distances["highest_profile"] = distances["least_distance_index"].apply(lambda x: RIASEC_dict[x])
-
-        distances.sort_values("distance",inplace=True)
-
-        first_program = {
-            "program":distances.loc[0, "program"],
-            "least_distance": round(distances.loc[0, "least_distance"],4),
-            "highest_profile": distances.loc[0, "highest_profile"]
-            }
-        second_program = {
-            "program":distances.loc[1, "program"],
-            "least_distance": round(distances.loc[1, "least_distance"],4),
-            "highest_profile": distances.loc[1, "highest_profile"]
-            }
-        third_program = {
-            "program":distances.loc[2, "program"],
-            "least_distance": round(distances.loc[2, "least_distance"],4),
-            "highest_profile": distances.loc[2, "highest_profile"]
-            }
-
-        return [first_program, second_program, third_program]
+        recommendations = recommend(self.all_programs, self.student_vector, k=k, metric=metric)
+
+        # personalities that increased over the session, largest increase first
+        change = self.all_student_vectors.change()
+        increased = [RIASEC_dict[int(axis)] for axis in np.argsort(-change) if change[axis] > 0]
+        for recommendation in recommendations:
+            recommendation["increased_profiles"] = increased
+
+        return recommendations
@@ -0,0 +1,473 @@
+# scripted bronze -> silver -> RIASEC vectors pipeline (notebooks 2 and 3 as stages)
+# notes: every programme is fingerprinted on its bronze programme row, its bronze
+# course rows and its manual patch; a run only cleans and scores programmes whose
+# fingerprint changed and reuses the stored silver rows and vectors for the rest.
+# the tf idf weights are fitted on a full run and then kept fixed, so a programme's
+# vector only depends on its own texts (--full refits them and recomputes everything).
+# outputs are written as parquet (to a temp file, then renamed) plus a csv export
+# with the names the notebooks and the app already read; without pyarrow only the
+# csv is written and read back. silver rows keep their place between runs, so an
+# incremental run only rewrites the lines of the programmes that changed.
+#
+#   python data_pipeline.py            # incremental
+#   python data_pipeline.py --full     # recompute everything, refit tf idf
+import argparse, ast, hashlib, json, os, re, threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent
+BRONZE = DATA_DIR / "data_programmes_courses" / "bronze"
+SILVER = DATA_DIR / "data_programmes_courses" / "silver"
+RIASEC_DIR = DATA_DIR / "data_RIASEC"
+PATCHES_PATH = DATA_DIR / "data_programmes_courses" / "programme_patches.json"
+STATE_PATH = SILVER / "_pipeline_state.json"
+
+# bump when a stage changes its output, forces a full run
+PIPELINE_VERSION = 1
+
+# ---------- silver stage (notebook 2) ----------
+
+PARAGRAPH_TARGETS = [
+    "course_objective",
+    "course_content",
+    "additional_information_teaching_methods",
+    "method_of_assessment",
+    "literature",
+    "additional_information_target_audience",
+    "recommended_background_knowledge",
+]
+HIDE_LIST = r"Hide\s*full\s*list\s*\((\d+)\)"
+
+
+def _norm_title(t):
+    t = re.sub(r"[^\w\s]", " ", str(t)).lower()
+    t = re.sub(r"\s+", " ", t).strip()
+    return t.replace(" ", "_")
+
+
+def _parse_blocks(s):
+    out = {k: None for k in PARAGRAPH_TARGETS}
+    if not isinstance(s, str) or not s.strip():
+        return out
+    try:
+        items = json.loads(s)
+    except Exception:
+        return out
+    if not isinstance(items, list):
+        return out
+    for item in items:
+        if not isinstance(item, str) or not item.strip():
+            continue
+        head, body = item.split("\n", 1) if "\n" in item else (item, "")
+        key = _norm_title(head)
+        if key in out:
+            out[key] = body.strip()
+    return out
+
+
+def _guess_programme_count(s):
+    parts = [p.strip() for p in (s or "").strip(" ;").split(";") if p.strip()]
+    return len(parts) if parts else pd.NA
+
+
+def clean_courses(df):
+    # bronze course rows -> silver course rows
+    df = df.drop(columns=["track_from_label"], errors="ignore").drop_duplicates().copy()
+
+    progs = df["course_programmes"].fillna("")
+    df["number_programmes"] = progs.str.extract(HIDE_LIST, expand=False).astype("Int64")
+    df["course_programmes"] = (
+        progs.str.replace(HIDE_LIST, "", regex=True)
+        .str.replace(r"\s{2,}", " ", regex=True)
+        .str.replace(r"(;\s*){2,}", "; ", regex=True)
+        .str.strip(" ;")
+    )
+    df["number_programmes"] = df["number_programmes"].fillna(
+        df["course_programmes"].map(_guess_programme_count)
+    ).astype("Int64")
+
+    parsed = df["course_paragraphs_json"].apply(_parse_blocks)
+    for k in PARAGRAPH_TARGETS:
+        df[k] = parsed.map(lambda d: d.get(k))
+
+    df["course_level"] = pd.to_numeric(df["course_level"], errors="coerce").astype("Int64")
+    # missing year from the course level: 100 -> 1, 200 -> 2, 300/400 -> 3
+    year_from_level = df["course_level"].map({100: 1, 200: 2, 300: 3, 400: 3})
+    df["year_num"] = pd.to_numeric(df["year_num"], errors="coerce").fillna(year_from_level.astype("float"))
+    return df
+
+
+def _ensure_list(x):
+    if isinstance(x, list):
+        return x
+    if isinstance(x, str):
+        x = x.strip()
+        if x.startswith("[") and x.endswith("]"):
+            try:
+                return ast.literal_eval(x)
+            except Exception:
+                return [x]
+        if x:
+            return [x]
+    return []
+
+
+def _year_descriptions(blocks):
+    out = {"year1_description": "", "year2_description": "", "year3_description": ""}
+    cols = {"first": "year1_description", "second": "year2_description", "third": "year3_description"}
+    for raw in _ensure_list(blocks):
+        s = str(raw).strip()
+        m = re.match(r"^\s*(first|second|third)\s*year", s, flags=re.I)
+        if not m:
+            continue
+        body = re.sub(r"^\s*(first|second|third)\s*year\s*", "", s, flags=re.I).strip()
+        col = cols[m.group(1).lower()]
+        # keep the longest version when duplicates exist
+        if len(body) > len(out[col]):
+            out[col] = body
+    return out
+
+
+def clean_programmes(df, patches):
+    # bronze programme rows -> silver programme rows, manual patches applied last
+    df = df.copy()
+    years = pd.DataFrame([_year_descriptions(b) for b in df["vunl_firstyear_description_blocks"]], index=df.index)
+    df = df.drop(columns=["vunl_firstyear_description_blocks"]).join(years)
+    for title, fields in patches.items():
+        mask = df["programme_title"].eq(title)
+        for col, value in fields.items():
+            if col not in df.columns:
+                df[col] = ""
+            df.loc[mask, col] = value
+    return df
+
+
+def task_programmes(courses, min_core=2):
+    # programmes with at least min_core first year, period 1, 6 ects courses
+    core = courses[
+        (courses["year_num"] == 1)
+        & (pd.to_numeric(courses["period"], errors="coerce") == 1)
+        & (pd.to_numeric(courses["ects"], errors="coerce") == 6)
+    ]
+    counts = core["programme_title"].value_counts()
+    return core, set(counts[counts >= min_core].index)
+
+
+# ---------- vector stage (notebook 3) ----------
+
+PROG_FIELDS = [
+    "sg_description",
+    "vunl_description",
+    "vunl_description_curriculum",
+    "vunl_future_description",
+    "vunl_future_career",
+    "year1_description",
+    "year2_description",
+    "year3_description",
+]
+COURSE_FIELDS = [
+    "course_objective",
+    "course_content",
+    "method_of_assessment",
+    "recommended_background_knowledge",
+]
+LETTERS = ["R", "I", "A", "S", "E", "C"]
+LEX = {
+    "R": ["lab","field","equipment","tools","build","repair","operate","install","measure",
+          "laboratory","prototype","machinery","hardware","electronics","sample","specimen","safety"
+          ,"construction","manual","physical","technician","maintenance","inspection","diagnose","weld"],
+    "I": ["analyze","theory","model","proof","derive","experiment","hypothesis","data",
+          "research","statistics","algorithm","simulate","evidence","inference","mathematics","physics","logic"
+          ,"quantitative","scientific","compute","computation","evaluate","study","investigate"],
+    "A": ["design","draw","sketch","compose","write","narrative","visual","media","art",
+          "music","film","theatre","creative","story","photography","gallery","curation"
+          ,"performance","aesthetic","illustrate","exhibit","craft","fashion","style"],
+    "S": ["help","support","advise","coach","teach","tutor","counsel","community","team",
+          "care","wellbeing","interview","facilitate","mentor","outreach","collaborate","group","clients"
+          ,"service","social","develop","train","educate"],
+    "E": ["business","lead","manage","strategy","sales","marketing","finance","entrepreneurship",
+          "pitch","negotiate","market","revenue","growth","product","stakeholder","budget","plan"
+          ,"customer","commercial","operation","organisational","investor","network"],
+    "C": ["organize","detail","procedure","policy","regulation","compliance","audit","accounting",
+          "schedule","record","document","database","spreadsheet","report","inventory","forms","workflow","quality"
+          ,"administration","logistics","systematic","process","standard"],
+}
+VOCAB = sorted({w for terms in LEX.values() for w in terms})
+TERM_ID = {w: i for i, w in enumerate(VOCAB)}
+# (vocab, letters) 0/1 matrix, sums tf idf weights per letter
+LETTER_MASK = np.array([[w in LEX[L] for L in LETTERS] for w in VOCAB], dtype=float)
+TARGET_ENTROPY = 1.18
+TOL = 0.01
+
+
+def clean_text(s):
+    if not isinstance(s, str):
+        return ""
+    s = s.lower()
+    s = re.sub(r"http[s]?://\S+", " ", s)
+    s = re.sub(r"[^a-z\s]", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _joined_text(df, fields):
+    for c in fields:
+        if c not in df.columns:
+            df[c] = ""
+    return df[fields].fillna("").astype(str).agg(" ".join, axis=1).apply(clean_text)
+
+
+def term_counts(texts):
+    # (docs, vocab) raw counts; texts are clean_text output, tokens of 2+ letters
+    out = np.zeros((len(texts), len(VOCAB)))
+    for i, text in enumerate(texts):
+        for tok in text.split():
+            j = TERM_ID.get(tok)
+            if j is not None:
+                out[i, j] += 1
+    return out
+
+
+def fit_idf(texts):
+    # smoothed idf over a fixed vocabulary, as TfidfVectorizer(vocabulary=VOCAB) fits it
+    df = (term_counts(texts) > 0).sum(axis=0)
+    return np.log((1 + len(texts)) / (1 + df)) + 1
+
+
+def riasec_rows(texts, idf, eps=1e-8):
+    # one l2 normalised riasec row per text: l2 tf idf row, summed per letter
+    tfidf = term_counts(texts) * idf
+    n = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf = np.divide(tfidf, n, out=np.zeros_like(tfidf), where=n > 0)
+    sums = tfidf @ LETTER_MASK
+    return sums / (np.linalg.norm(sums, axis=1, keepdims=True) + eps)
+
+
+def _l2(vec, eps=1e-8):
+    return vec / (np.sqrt((vec * vec).sum()) + eps)
+
+
+def programme_vector(prog_text, course_texts, ects, idf):
+    # 0.5 programme description + 0.5 ects weighted course texts, both l2 normalised
+    p = riasec_rows([prog_text], idf)[0] if prog_text is not None else np.zeros(6)
+    keep = [i for i, t in enumerate(course_texts) if len(t) > 0]
+    if keep:
+        w = np.asarray(ects, dtype=float)[keep]
+        w = w / w.sum() if w.sum() > 0 else np.full(len(keep), 1 / len(keep))
+        c = _l2(w @ riasec_rows([course_texts[i] for i in keep], idf))
+    else:
+        c = np.zeros(6)
+    return _l2(0.5 * p + 0.5 * c)
+
+
+def _entropy(p):
+    p = p[p > 0]
+    return float(-np.sum(p * np.log(p))) if p.size else 0.0
+
+
+def adjust_to_entropy(vec, target=TARGET_ENTROPY, tol=TOL):
+    # temperature T for softmax(v / T) with entropy close to target, returned l2 normalised
+    v = np.asarray(vec, dtype=float)
+    lo, hi = 0.01, 10.0
+    for _ in range(50):
+        T = (lo + hi) / 2.0
+        x = v / T
+        p = np.exp(x - x.max())
+        p /= p.sum()
+        entropy = _entropy(p)
+        if abs(entropy - target) < tol:
+            break
+        if entropy > target:
+            hi = T
+        else:
+            lo = T
+    n = np.linalg.norm(p)
+    return (p / n if n else np.ones_like(p) / np.sqrt(len(p))), entropy
+
+
+# ---------- fingerprints, state, io ----------
+
+def _canon(value):
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+
+def _hash_rows(frame):
+    # order independent hash of a frame's rows
+    rows = sorted(json.dumps([_canon(v) for v in row], ensure_ascii=False) for row in frame.itertuples(index=False))
+    return hashlib.sha1("\n".join([json.dumps(list(frame.columns))] + rows).encode("utf-8")).hexdigest()
+
+
+def fingerprints(programmes, courses, patches):
+    # programme_title -> hash of everything its silver rows and vector are built from
+    titles = list(dict.fromkeys(list(programmes["programme_title"]) + list(courses["programme_title"])))
+    by_prog = dict(tuple(programmes.groupby("programme_title", sort=False)))
+    by_course = dict(tuple(courses.groupby("programme_title", sort=False)))
+    empty_p, empty_c = programmes.iloc[:0], courses.iloc[:0]
+    return {
+        t: hashlib.sha1("|".join([
+            _hash_rows(by_prog.get(t, empty_p)),
+            _hash_rows(by_course.get(t, empty_c)),
+            json.dumps(patches.get(t), sort_keys=True, ensure_ascii=False),
+        ]).encode("utf-8")).hexdigest()
+        for t in titles
+    }
+
+
+def _atomic(path, write):
+    # write(tmp_path), then rename over path so readers never see half a file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def write_table(frame, path, csv_encoding="utf-8"):
+    # path without suffix -> path.parquet and path.csv (csv only without pyarrow)
+    _atomic(path.with_suffix(".csv"), lambda p: frame.to_csv(p, index=False, encoding=csv_encoding))
+    try:
+        _atomic(path.with_suffix(".parquet"), lambda p: frame.to_parquet(p, index=False))
+    except ImportError:
+        # a parquet file left from an older run would be stale now
+        path.with_suffix(".parquet").unlink(missing_ok=True)
+
+
+def read_table(path):
+    fp = path.with_suffix(".parquet")
+    if fp.exists():
+        try:
+            return pd.read_parquet(fp)
+        except ImportError:
+            pass
+    fp = path.with_suffix(".csv")
+    # utf-8-sig also reads plain utf-8; only empty cells are missing, texts like "n/a" stay
+    return pd.read_csv(fp, encoding="utf-8-sig", keep_default_na=False, na_values=[""]) if fp.exists() else None
+
+
+def load_state():
+    if STATE_PATH.exists():
+        try:
+            return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+        except ValueError:
+            pass
+    return {}
+
+
+def _splice(prev, new, changed, removed):
+    # stored rows keep their place; a changed programme's new rows go where its
+    # old rows started, programmes that are new go at the end
+    drop = prev["programme_title"].isin(set(changed) | set(removed)).to_numpy()
+    new_by_title = dict(tuple(new.groupby("programme_title", sort=False)))
+    titles = prev["programme_title"].to_numpy()
+    pieces, placed, start = [], set(), 0
+    for i in np.flatnonzero(drop):
+        t = titles[i]
+        if t in new_by_title and t not in placed:
+            pieces.append(prev.iloc[start:i][~drop[start:i]])
+            pieces.append(new_by_title[t])
+            placed.add(t)
+            start = i
+    pieces.append(prev.iloc[start:][~drop[start:]])
+    pieces.extend(g for t, g in new_by_title.items() if t not in placed)
+    return pd.concat(pieces, ignore_index=True)
+
+
+# ---------- run ----------
+
+def run(full=False, verbose=True):
+    """
+    Bring silver tables and RIASEC vectors up to date with the bronze csvs.
+    Returns {"changed": [...], "removed": [...], "full": bool}.
+    """
+    log = print if verbose else (lambda *a, **k: None)
+    prog_b = pd.read_csv(BRONZE / "df_programmes_bronze.csv")
+    cour_b = pd.read_csv(BRONZE / "df_courses_bronze.csv")
+    patches = json.loads(PATCHES_PATH.read_text(encoding="utf-8")) if PATCHES_PATH.exists() else {}
+
+    state = load_state()
+    prev_silver_p = read_table(SILVER / "df_programmes_silver")
+    prev_silver_c = read_table(SILVER / "df_courses_silver")
+    prev_vectors = read_table(RIASEC_DIR / "df_RIASEC_programmes_vectors")
+    prev_adjusted = read_table(RIASEC_DIR / "df_RIASEC_programmes_vectors_adjusted")
+    full = (full or state.get("version") != PIPELINE_VERSION or state.get("vocab") != VOCAB
+            or any(t is None for t in (prev_silver_p, prev_silver_c, prev_vectors, prev_adjusted)))
+
+    fp = fingerprints(prog_b, cour_b, patches)
+    old_fp = {} if full else state.get("programmes", {})
+    changed = [t for t in fp if old_fp.get(t) != fp[t]]
+    removed = [t for t in old_fp if t not in fp]
+    log(f"{'full' if full else 'incremental'} run: {len(changed)} changed, {len(removed)} removed, "
+        f"{len(fp) - len(changed)} unchanged")
+    if not changed and not removed:
+        return {"changed": [], "removed": [], "full": full}
+
+    # silver: clean the changed programmes, keep stored rows for the rest
+    new_p = clean_programmes(prog_b[prog_b["programme_title"].isin(changed)], patches)
+    new_c = clean_courses(cour_b[cour_b["programme_title"].isin(changed)])
+    if full:
+        # bronze row order
+        silver_p, silver_c = new_p.reset_index(drop=True), new_c.reset_index(drop=True)
+    else:
+        silver_p = _splice(prev_silver_p, new_p, changed, removed)
+        silver_c = _splice(prev_silver_c, new_c, changed, removed)
+
+    # vectors: refit idf on a full run only
+    prog_text = _joined_text(silver_p.copy(), PROG_FIELDS)
+    course_text = _joined_text(silver_c.copy(), COURSE_FIELDS)
+    if full:
+        idf = fit_idf(list(prog_text) + list(course_text))
+    else:
+        idf = np.asarray(state["idf"], dtype=float)
+
+    first_text = dict(zip(silver_p["programme_title"][::-1], prog_text[::-1]))  # first row per title wins
+    ects = pd.to_numeric(silver_c["ects"], errors="coerce").fillna(0.0)
+    rows = []
+    for t in changed:
+        m = (silver_c["programme_title"] == t).to_numpy()
+        vec = programme_vector(first_text.get(t), list(course_text[m]), ects[m].to_numpy(), idf)
+        rows.append((t, vec))
+    new_vec = pd.DataFrame([v for _, v in rows], columns=LETTERS).assign(programme_title=[t for t, _ in rows])
+    new_adj = []
+    for t, v in rows:
+        adj, entropy = adjust_to_entropy(v)
+        new_adj.append({"programme_title": t, **dict(zip(LETTERS, adj)), "entropy": entropy})
+    new_adj = pd.DataFrame(new_adj, columns=["programme_title", *LETTERS, "entropy"])
+
+    if not full:
+        drop = set(changed) | set(removed)
+        new_vec = pd.concat([prev_vectors[~prev_vectors["programme_title"].isin(drop)], new_vec], ignore_index=True)
+        new_adj = pd.concat([prev_adjusted[~prev_adjusted["programme_title"].isin(drop)], new_adj], ignore_index=True)
+    vectors = new_vec[["programme_title", *LETTERS]].sort_values("programme_title").reset_index(drop=True)
+    adjusted = new_adj.sort_values("programme_title").reset_index(drop=True)
+
+    core, keep = task_programmes(silver_c)
+    write_table(silver_p, SILVER / "df_programmes_silver", "utf-8-sig")
+    write_table(silver_c, SILVER / "df_courses_silver", "utf-8-sig")
+    write_table(silver_p[silver_p["programme_title"].isin(keep)], SILVER / "df_programmes_filtered_silver", "utf-8-sig")
+    write_table(silver_c[silver_c["programme_title"].isin(keep)], SILVER / "df_courses_filtered_silver", "utf-8-sig")
+    write_table(core[core["programme_title"].isin(keep)].reset_index(drop=True),
+                SILVER / "df_courses_tasks_silver", "utf-8-sig")
+    write_table(vectors, RIASEC_DIR / "df_RIASEC_programmes_vectors")
+    write_table(adjusted, RIASEC_DIR / "df_RIASEC_programmes_vectors_adjusted")
+
+    # state last: a crash before this point just redoes the same programmes next run
+    new_state = {"version": PIPELINE_VERSION, "vocab": VOCAB, "idf": idf.tolist(), "programmes": fp}
+    _atomic(STATE_PATH, lambda p: p.write_text(json.dumps(new_state, indent=1), encoding="utf-8"))
+    log(f"wrote silver tables and {len(vectors)} vectors")
+    return {"changed": changed, "removed": removed, "full": full}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bronze -> silver -> RIASEC vectors, only for changed programmes")
+    parser.add_argument("--full", action="store_true", help="recompute every programme and refit tf idf")
+    args = parser.parse_args()
+    run(full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,130 @@
 # simple Selenium scraper for studiegids
 # notes: one section open at a time, scrape visible tables after each click
+# waits are conditions on the DOM (never fixed sleeps); with profile=True
+# every wait is logged in wait_log, see wait_profile()
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-import re, time
-
-ROOT = "#study-program"
+import time
+from pathlib import Path
+
+from .studiegids_rows import (
+    ROOT, is_minor, labels_for, labels_from_stack, row_from_cells, skip_section, track_from, year_from,
+)
+
+# first four cell texts (link text when the cell has a link) of every row in
+# every visible tbody under arguments[0], like the per-cell webdriver path
+ROW_CELLS_JS = """
+const root = document.querySelector(arguments[0]);
+if (!root) return [];
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const text = td => { const a = td.querySelector('a'); return ((a ? a.innerText : td.innerText) || '').trim(); };
+const rows = [];
+for (const tb of root.querySelectorAll('table tbody')) {
+  if (!visible(tb)) continue;
+  for (const tr of tb.querySelectorAll('tr')) {
+    const tds = Array.from(tr.querySelectorAll('td'));
+    if (tds.length) rows.push(tds.slice(0, 4).map(text));
+  }
+}
+return rows;
+"""
+
+# outerHTML of the page with every accordion section under arguments[0] expanded
+# (collapsed state removed from the content panels and their headers)
+SNAPSHOT_JS = """
+const root = document.querySelector(arguments[0]);
+if (root) {
+  for (const c of root.querySelectorAll('.accordion-content')) {
+    c.removeAttribute('hidden');
+    c.removeAttribute('aria-hidden');
+    c.style.removeProperty('display');
+    c.style.removeProperty('visibility');
+    c.classList.remove('hidden', 'd-none', 'collapsed');
+  }
+  for (const h of root.querySelectorAll('.accordion [aria-expanded="false"]')) h.setAttribute('aria-expanded', 'true');
+}
+return document.documentElement.outerHTML;
+"""
 
 class StudiegidsScraper:
-    def __init__(self, driver, wait_seconds=20, debug=False):
+    # bulk_rows: read table rows with one in-page script (ROW_CELLS_JS) instead of
+    # webdriver calls per cell; the per-cell path stays as fallback
+    def __init__(self, driver, wait_seconds=20, debug=False, profile=False, bulk_rows=True):
         self.driver = driver
+        self.bulk_rows = bulk_rows
         self.wait = WebDriverWait(driver, wait_seconds)
         self.debug = debug
+        self.profile = profile
+        self.wait_log = []  # one dict per wait: wait, seconds, retries, ok
+        self._cookies_done = False
+
+    # condition based waits
+    def _wait_for(self, name, condition, timeout=5, poll=0.05):
+        # polls condition(driver) until truthy, returns its value or False on timeout
+        polls = 0
+        def counted(d):
+            nonlocal polls
+            polls += 1
+            return condition(d)
+        t0 = time.perf_counter()
+        try:
+            result = WebDriverWait(
+                self.driver, timeout, poll_frequency=poll,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException),
+            ).until(counted)
+        except TimeoutException:
+            result = False
+        if self.profile:
+            self.wait_log.append({"wait": name, "seconds": time.perf_counter() - t0,
+                                  "retries": max(polls - 1, 0), "ok": bool(result)})
+        return result
+
+    def wait_profile(self):
+        # per wait name: calls, total and max seconds, retries, timeouts
+        prof = {}
+        for w in self.wait_log:
+            p = prof.setdefault(w["wait"], {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "retries": 0, "timeouts": 0})
+            p["calls"] += 1
+            p["seconds"] += w["seconds"]
+            p["max_seconds"] = max(p["max_seconds"], w["seconds"])
+            p["retries"] += w["retries"]
+            p["timeouts"] += not w["ok"]
+        return dict(sorted(prof.items(), key=lambda kv: -kv[1]["seconds"]))
+
+    def _scroll_to(self, el):
+        self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
+        return self._wait_for("scroll_clickable", EC.element_to_be_clickable(el), timeout=2)
+
+    def _result_hrefs(self):
+        return [a.get_attribute("href") for a in self.driver.find_elements(By.CSS_SELECTOR, ".sg-search-result a[href]")]
+
+    def _wait_results_refresh(self, prev_hrefs, timeout=6):
+        # true once a result card links somewhere that was not in prev_hrefs
+        prev = set(prev_hrefs)
+        return bool(self._wait_for(
+            "results_refresh", lambda d: any(h and h not in prev for h in self._result_hrefs()), timeout=timeout
+        ))
+
+    def _expand_state(self, container_css):
+        # (aria-expanded of the header, content panel displayed) of an accordion item
+        hdr = self.driver.find_elements(By.CSS_SELECTOR, f"{container_css} [aria-expanded]")
+        content = self.driver.find_elements(By.CSS_SELECTOR, f"{container_css} .accordion-content")
+        return (hdr[0].get_attribute("aria-expanded") if hdr else None,
+                content[0].is_displayed() if content else None)
+
+    def _tables_ready(self, container_css):
+        # true once the section has no tables or at least one visible tbody
+        tbodys = self.driver.find_elements(By.CSS_SELECTOR, f"{container_css} .accordion-content table tbody")
+        return not tbodys or any(tb.is_displayed() for tb in tbodys)
 
     # small helpers
     def _dismiss_cookies(self):
-        # tries a few common accept buttons, also inside iframes
+        # tries a few common accept buttons, also inside iframes; once accepted the
+        # banner does not come back for this driver, so later pages skip the lookup
+        if self._cookies_done:
+            return
         xpaths = [
             "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'accept')]",
             "//button[contains(., 'Akkoord')]",
@@ -23,23 +132,30 @@ class StudiegidsScraper:
             "//button[contains(., 'Accept all')]",
             "//button[contains(., 'Accept')]",
         ]
-        def try_click():
+        def visible_button(d):
             for xp in xpaths:
-                try:
-                    btn = WebDriverWait(self.driver, 2).until(EC.element_to_be_clickable((By.XPATH, xp)))
-                    self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-                    time.sleep(0.2)
-                    btn.click()
-                    return True
-                except Exception:
-                    pass
+                for b in d.find_elements(By.XPATH, xp):
+                    if b.is_displayed() and b.is_enabled():
+                        return b
             return False
-        if try_click():
+        def try_click(timeout):
+            btn = self._wait_for("cookie_button", visible_button, timeout=timeout)
+            if not btn:
+                return False
+            try:
+                self._scroll_to(btn)
+                btn.click()
+                self._wait_for("cookie_dismissed", EC.invisibility_of_element(btn), timeout=2)
+                self._cookies_done = True
+                return True
+            except Exception:
+                return False
+        if try_click(timeout=2):
             return
         for fr in self.driver.find_elements(By.CSS_SELECTOR, "iframe"):
             try:
                 self.driver.switch_to.frame(fr)
-                if try_click():
+                if try_click(timeout=0.5):
                     self.driver.switch_to.default_content()
                     return
             except Exception:
@@ -51,7 +167,12 @@ class StudiegidsScraper:
         base = url.split("#/tab=")[0]
         self.driver.get(f"{base}#/tab=3")
         self._dismiss_cookies()
-        time.sleep(0.8)
+        # study programme rendered: accordion items or a plain table
+        self._wait_for(
+            "tab_three",
+            lambda d: d.find_elements(By.CSS_SELECTOR, f"{ROOT} .accordion > div, {ROOT} table"),
+            timeout=10,
+        )
 
     def _section_title(self, container_css):
         # reads a title text for any accordion item
@@ -75,7 +196,7 @@ class StudiegidsScraper:
             return ""
 
     def _click_section(self, container_css):
-        # clicks a section header and waits a moment
+        # clicks a section header, waits until it toggled and its tables are visible
         for sel in [
             f"{container_css} .accordion-title",
             f"{container_css} [id$='-accordion-label']",
@@ -83,99 +204,75 @@ class StudiegidsScraper:
         ]:
             try:
                 el = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel)))
-                self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                time.sleep(0.2)
+                before = self._expand_state(container_css)
+                self._scroll_to(el)
                 el.click()
-                time.sleep(0.5)
+                if before != (None, None):
+                    self._wait_for("section_toggle", lambda d: self._expand_state(container_css) != before, timeout=3)
+                self._wait_for("section_tables", lambda d: self._tables_ready(container_css), timeout=3)
                 return True
             except Exception:
                 continue
         return False
 
+    # label helpers live in studiegids_rows so the offline parser shares them
     def _is_minor(self, txt):
-        return bool(re.search(r"\bminor\b", str(txt or ""), flags=re.I))
+        return is_minor(txt)
 
     def _year_from(self, txt):
-        s = str(txt or "")
-        if re.search(r"\bfirst\s*year\b|\byear\s*1\b", s, flags=re.I): return 1
-        if re.search(r"\bsecond\s*year\b|\byear\s*2\b", s, flags=re.I): return 2
-        if re.search(r"\bthird\s*year\b|\byear\s*3\b", s, flags=re.I): return 3
-        return None
+        return year_from(txt)
 
     def _track_from(self, txt):
-        # removes year part and common prefixes
-        s = re.sub(r"\byear\s*\d\b.*", "", str(txt or ""), flags=re.I).strip()
-        s = re.sub(r"^(Track|Specialization)\s+", "", s, flags=re.I).strip()
-        return s
+        return track_from(txt)
 
     def _labels_for(self, top_label, child_label):
-        # prefer year from child, else from top
-        ylab = child_label if self._year_from(child_label) else (top_label if self._year_from(top_label) else "")
-        # if top has a year, take track from child, else from top
-        if self._year_from(top_label):
-            tlab = self._track_from(child_label)
-        else:
-            tlab = self._track_from(top_label)
-        return ylab, tlab
+        return labels_for(top_label, child_label)
 
-    def _scrape_visible_rows(self, track_label, year_label):
-        # walks all visible tables under ROOT and returns course dicts
-        out = []
+    def _row_cells_js(self):
+        # texts of the first four cells of every row in every visible tbody under ROOT,
+        # in one round trip; None when the script fails (caller falls back to webdriver)
+        try:
+            return self.driver.execute_script(ROW_CELLS_JS, ROOT)
+        except Exception:
+            return None
+
+    def _row_cells_webdriver(self):
+        # same as _row_cells_js, one webdriver call per row and cell (slow fallback)
+        cells = []
         try:
             scope = self.driver.find_element(By.CSS_SELECTOR, ROOT)
         except Exception:
-            return out
-        tbodys = scope.find_elements(By.CSS_SELECTOR, "table tbody")
-        for tb in tbodys:
-            if not tb.is_displayed(): 
+            return cells
+        for tb in scope.find_elements(By.CSS_SELECTOR, "table tbody"):
+            if not tb.is_displayed():
                 continue
             for tr in tb.find_elements(By.CSS_SELECTOR, "tr"):
                 tds = tr.find_elements(By.CSS_SELECTOR, "td")
-                if not tds: 
+                if not tds:
                     continue
-                # name
-                try:
-                    name = tds[0].find_element(By.CSS_SELECTOR, "a").text.strip()
-                except Exception:
-                    name = tds[0].text.strip()
-                if not name: 
-                    continue
-                # period
-                per = None
-                if len(tds) > 1:
-                    try:
-                        per_text = tds[1].find_element(By.CSS_SELECTOR, "a").text.strip()
-                    except Exception:
-                        per_text = tds[1].text.strip()
-                    m = re.search(r"(\d+)", per_text)
-                    per = int(m.group(1)) if m else None
-                # ects
-                ects = None
-                if len(tds) > 2:
+                texts = []
+                for td in tds[:4]:
                     try:
-                        ects_text = tds[2].find_element(By.CSS_SELECTOR, "a").text.strip()
+                        texts.append(td.find_element(By.CSS_SELECTOR, "a").text.strip())
                     except Exception:
-                        ects_text = tds[2].text.strip()
-                    m = re.search(r"(\d+)", ects_text)
-                    ects = int(m.group(1)) if m else None
-                # code
-                code = ""
-                if len(tds) > 3:
-                    try:
-                        code = tds[3].find_element(By.CSS_SELECTOR, "a").text.strip()
-                    except Exception:
-                        code = tds[3].text.strip()
-                # drop obvious non rows
-                if not code and per is None and ects is None:
-                    continue
-                out.append({
-                    "course_name": name,
-                    "period": per,
-                    "ects": ects,
-                    "code": code,
-                    "track": track_label or "",
-                    "year_label": year_label or ""
-                })
+                        texts.append(td.text.strip())
+                cells.append(texts)
+        return cells
+
+    def _visible_row_cells(self):
+        cells = self._row_cells_js() if self.bulk_rows else None
+        return cells if cells is not None else self._row_cells_webdriver()
+
+    def _row_from_cells(self, texts, track_label, year_label):
+        return row_from_cells(texts, track_label, year_label)
+
+    def _scrape_visible_rows(self, track_label, year_label):
+        # walks all visible tables under ROOT and returns course dicts
+        out = []
+        for texts in self._visible_row_cells():
+            row = self._row_from_cells(texts, track_label, year_label)
+            if row:
+                out.append(row)
         return out
 
     def list_programmes(self, listing_url, faculties):
@@ -190,25 +287,34 @@ class StudiegidsScraper:
         def _open_filter_panel(title_text):
             xp = f"//div[contains(@class,'sg-dropdown-title')][.//span[contains(normalize-space(.), '{title_text}')]]"
             hdr = w.until(EC.element_to_be_clickable((By.XPATH, xp)))
-            d.execute_script("arguments[0].scrollIntoView({block:'center'});", hdr)
-            time.sleep(0.2)
+            self._scroll_to(hdr)
             hdr.click()
-            time.sleep(0.2)
             try:
                 panel = hdr.find_element(By.XPATH, "following-sibling::*[1]")
+                self._wait_for("filter_panel_open", lambda x: panel.is_displayed(), timeout=2)
             except Exception:
                 panel = d
             return panel
 
+        def _checkbox_for(label):
+            # the input a label toggles: by its for attribute, else nested inside it
+            target = label.get_attribute("for")
+            found = d.find_elements(By.ID, target) if target else label.find_elements(By.CSS_SELECTOR, "input")
+            return found[0] if found else None
+
+        def _wait_toggled(cb, before):
+            if cb is not None:
+                self._wait_for("filter_option_toggle", lambda x: cb.is_selected() != before, timeout=2)
+
         def _click_option(panel, text_contains=None, id_prefix=None):
             if id_prefix:
                 try:
                     cb = panel.find_element(By.CSS_SELECTOR, f"input[id^='{id_prefix}']")
                     lab = cb.find_element(By.XPATH, "following-sibling::label[1]")
+                    before = cb.is_selected()
                     d.execute_script("arguments[0].scrollIntoView({block:'center'});", lab)
-                    time.sleep(0.1)
                     d.execute_script("arguments[0].click();", lab)
-                    time.sleep(0.2)
+                    _wait_toggled(cb, before)
                     return True
                 except Exception:
                     pass
@@ -218,10 +324,11 @@ class StudiegidsScraper:
                         By.XPATH,
                         f".//label[contains(translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '{text_contains.lower()}')]"
                     )
-                    d.execute_script("arguments[0].scrollIntoView({block:'center'});", lbl)
-                    time.sleep(0.1)
+                    cb = _checkbox_for(lbl)
+                    before = cb.is_selected() if cb is not None else None
+                    self._scroll_to(lbl)
                     lbl.click()
-                    time.sleep(0.2)
+                    _wait_toggled(cb, before)
                     return True
                 except Exception:
                     pass
@@ -261,40 +368,30 @@ class StudiegidsScraper:
                     continue
             return None
 
-        def _wait_results_refresh(prev_hrefs, timeout=6):
-            t0 = time.time()
-            while time.time() - t0 < timeout:
-                try:
-                    anchors = d.find_elements(By.CSS_SELECTOR, ".sg-search-result a[href]")
-                    hrefs = [a.get_attribute("href") for a in anchors if a.get_attribute("href")]
-                    if any(h not in prev_hrefs for h in hrefs):
-                        return True
-                except Exception:
-                    pass
-                time.sleep(0.2)
-            return False
-
         # 1. open listing and wait for filters or results
         d.get(listing_url)
         self._dismiss_cookies()
         w.until(lambda x: x.find_elements(By.CSS_SELECTOR, "div.sg-dropdown-title") or x.find_elements(By.CSS_SELECTOR, ".sg-search-result"))
 
-        # 2. Language
+        # 2. Language, wait until the result list reflects the filter
         try:
+            prev = self._result_hrefs()
             lang_panel = _open_filter_panel("Language")
             clicked = _click_option(lang_panel, id_prefix="LanguageEN")
             if not clicked:
                 clicked = _click_option(lang_panel, text_contains="english")
-            time.sleep(0.5)
+            if clicked:
+                self._wait_results_refresh(prev, timeout=4)
         except Exception:
             pass
 
         # 3. Faculty
         try:
+            prev = self._result_hrefs()
             fac_panel = _open_filter_panel("Faculty")
-            for fac in faculties:
-                _click_option(fac_panel, text_contains=fac)
-            time.sleep(0.6)
+            clicked = [_click_option(fac_panel, text_contains=fac) for fac in faculties]
+            if any(clicked):
+                self._wait_results_refresh(prev, timeout=4)
         except Exception:
             pass
 
@@ -305,16 +402,14 @@ class StudiegidsScraper:
         # 5. navigate to page two with several strategies
         try:
             d.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.6)
-            nav = _find_paginator()
+            nav = self._wait_for("paginator", lambda x: _find_paginator() or False, timeout=3) or None
             if nav:
                 clicked = False
 
                 # strategy a. explicit page 2 by text or aria label
                 for el in nav.find_elements(By.XPATH, ".//a[normalize-space()='2'] | .//button[normalize-space()='2'] | .//*[@aria-label='2' or @aria-label='Go to page 2']"):
                     try:
-                        d.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                        time.sleep(0.1)
+                        self._scroll_to(el)
                         el.click()
                         clicked = True
                         break
@@ -339,8 +434,7 @@ class StudiegidsScraper:
                             lab = (link.text or "").strip()
                             aria = link.get_attribute("aria-label") or ""
                             if lab == "2" or "page 2" in aria.lower() or aria.strip() == "2":
-                                d.execute_script("arguments[0].scrollIntoView({block:'center'});", link)
-                                time.sleep(0.1)
+                                self._scroll_to(link)
                                 link.click()
                                 clicked = True
                                 break
@@ -351,8 +445,7 @@ class StudiegidsScraper:
                 if not clicked:
                     for el in nav.find_elements(By.XPATH, ".//*[@aria-label='Next'] | .//a[contains(@class,'sg-pagination__next')] | .//button[contains(@class,'sg-pagination__next')]"):
                         try:
-                            d.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                            time.sleep(0.1)
+                            self._scroll_to(el)
                             el.click()
                             clicked = True
                             break
@@ -361,7 +454,7 @@ class StudiegidsScraper:
 
                 # wait for a real refresh, then read again
                 if clicked:
-                    _wait_results_refresh(seen, timeout=6)
+                    self._wait_results_refresh(seen, timeout=6)
                     items2 = _read_cards()
                     for it in items2:
                         if it["url"] not in seen:
@@ -374,103 +467,32 @@ class StudiegidsScraper:
 
 
 
-    def parse_programme_studiegids(self, url, skip_honors=False, include_minors=True):
+    def parse_programme_studiegids(self, url, skip_honors=False, include_minors=True, snapshot_path=None):
         """
         Open tab 3. Click every accordion top section and every nested section.
         After each click, scrape all visible tables under the study area.
         Include minors by default. Optionally skip honors.
+        With snapshot_path, also save the expanded page there once all sections
+        were opened, for studiegids_offline.parse_snapshot.
         """
         # go to the Study programme tab
         self._open_tab_three(url)
 
         out = []
         seen = set()
-        ROOT = "#study-program"
-
-        def labels_from_stack(stack):
-            """derive track label and year label from the labels stack"""
-            year_label = ""
-            for lab in reversed(stack):
-                if re.search(r"\byear\b", str(lab), flags=re.I):
-                    year_label = lab
-                    break
-            track_label = ""
-            for lab in stack:
-                s = str(lab or "")
-                if re.search(r"\byear\b", s, flags=re.I):
-                    continue
-                # strip common prefixes
-                s2 = re.sub(r"^(Track|Specialization|Specialisation)\s+", "", s, flags=re.I).strip()
-                # ignore generic group names when picking a track
-                if re.search(r"\b(compulsory|constrained|choice|elective)\b", s2, flags=re.I):
-                    continue
-                track_label = s2 if s2 else track_label
-                if track_label:
-                    break
-            return track_label, year_label
 
         def scrape_now(stack):
             """scrape every visible course row under the whole study area right now"""
             track_label, year_label = labels_from_stack(stack)
-            try:
-                scope = self.driver.find_element(By.CSS_SELECTOR, ROOT)
-            except Exception:
-                return
-            tbodys = scope.find_elements(By.CSS_SELECTOR, "table tbody")
-            for tb in tbodys:
-                if not tb.is_displayed():
+            # keep rows even without code, but drop obvious summary lines
+            for texts in self._visible_row_cells():
+                row = self._row_from_cells(texts, track_label, year_label)
+                if not row:
                     continue
-                for tr in tb.find_elements(By.CSS_SELECTOR, "tr"):
-                    tds = tr.find_elements(By.CSS_SELECTOR, "td")
-                    if not tds:
-                        continue
-                    # name
-                    try:
-                        name = tds[0].find_element(By.CSS_SELECTOR, "a").text.strip()
-                    except Exception:
-                        name = tds[0].text.strip()
-                    if not name:
-                        continue
-                    # period
-                    per = None
-                    if len(tds) > 1:
-                        try:
-                            per_text = tds[1].find_element(By.CSS_SELECTOR, "a").text.strip()
-                        except Exception:
-                            per_text = tds[1].text.strip()
-                        m = re.search(r"(\d+)", per_text)
-                        per = int(m.group(1)) if m else None
-                    # ects
-                    ects = None
-                    if len(tds) > 2:
-                        try:
-                            ects_text = tds[2].find_element(By.CSS_SELECTOR, "a").text.strip()
-                        except Exception:
-                            ects_text = tds[2].text.strip()
-                        m = re.search(r"(\d+)", ects_text)
-                        ects = int(m.group(1)) if m else None
-                    # code
-                    code = ""
-                    if len(tds) > 3:
-                        try:
-                            code = tds[3].find_element(By.CSS_SELECTOR, "a").text.strip()
-                        except Exception:
-                            code = tds[3].text.strip()
-                    # keep rows even without code, but drop obvious summary lines
-                    if not code and per is None and ects is None:
-                        continue
-                    row = {
-                        "course_name": name,
-                        "period": per,
-                        "ects": ects,
-                        "code": code,
-                        "track": track_label or "",
-                        "year_label": year_label or "",
-                    }
-                    key = (row["course_name"], row["code"], row["track"], row["year_label"])
-                    if key not in seen:
-                        seen.add(key)
-                        out.append(row)
+                key = (row["course_name"], row["code"], row["track"], row["year_label"])
+                if key not in seen:
+                    seen.add(key)
+                    out.append(row)
 
         def section_title(container_css):
             """read a title for any accordion container"""
@@ -494,22 +516,8 @@ class StudiegidsScraper:
                 return ""
 
         def click_header(container_css):
-            """click the header of a section, wait briefly for DOM update"""
-            for sel in [
-                f"{container_css} .accordion-title",
-                f"{container_css} [id$='-accordion-label']",
-                f"{container_css} button",
-            ]:
-                try:
-                    el = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, sel)))
-                    self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                    time.sleep(0.2)
-                    el.click()
-                    time.sleep(0.4)
-                    return True
-                except Exception:
-                    continue
-            return False
+            """click the header of a section, wait until it toggled and its tables show"""
+            return self._click_section(container_css)
 
         def child_selectors(parent_css):
             """return fresh css selectors for direct child accordion items"""
@@ -532,9 +540,7 @@ class StudiegidsScraper:
             if not title:
                 return
             # include minors by default, optionally skip honors
-            if not include_minors and re.search(r"\bminor\b", title, flags=re.I):
-                return
-            if skip_honors and re.search(r"\bhonours|\bhonors", title, flags=re.I):
+            if skip_section(title, skip_honors, include_minors):
                 return
 
             click_header(container_css)
@@ -547,6 +553,7 @@ class StudiegidsScraper:
         # if there are no accordions, scrape whatever is visible and return
         if not self.driver.find_elements(By.CSS_SELECTOR, f"{ROOT} .accordion > div"):
             scrape_now([])
+            self._save_snapshot(snapshot_path)
             return out
 
         # always start by scraping after opening each top section, then drill down
@@ -556,7 +563,14 @@ class StudiegidsScraper:
             # do not pre filter minors here, the user asked to include all sections
             walk(top_css, [], 0)
 
+        self._save_snapshot(snapshot_path)
         return out
 
-
-        return out
+    def _save_snapshot(self, path):
+        # current DOM as html; only one section stays open, so every section's
+        # content is expanded first (SNAPSHOT_JS) to keep all tables in the file
+        if not path:
+            return
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.driver.execute_script(SNAPSHOT_JS, ROOT), encoding="utf-8")
@@ -0,0 +1,141 @@
+# offline parser for saved studiegids programme pages, no browser needed
+# notes: save pages once with parse_programme_studiegids(url, snapshot_path=...)
+# or StudiegidsPool(snapshot_dir=...), then rebuild course rows from the html.
+# sections are walked like the live scraper (title, minor/honours filter,
+# labels from the stack of open sections); each table gets the labels of the
+# sections it sits in, which is what the live walk records on first visit.
+# tables in hidden containers inside a section (display:none tabs, hidden
+# attribute) are skipped, like ROW_CELLS_JS which only reads rendered tbodies;
+# a collapsed section itself does not count, the live walk opens every section
+import re
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+from .studiegids_rows import ROOT, labels_from_stack, row_from_cells, skip_section, snapshot_name
+
+TITLE_SELECTORS = [".accordion-title", "[id$='-accordion-label']", "button", "h3", "h4"]
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.I)
+HIDDEN_CLASSES = {"hidden", "d-none", "visually-hidden", "sr-only"}
+
+
+def _text(el):
+    # whitespace normalised text, close to what selenium .text gives
+    return " ".join(el.get_text(" ").split())
+
+
+def _section_title(item):
+    # first match per selector, like driver.find_element
+    for sel in TITLE_SELECTORS:
+        el = item.select_one(sel)
+        if el is not None and _text(el):
+            return _text(el)
+    return _text(item)
+
+
+def _hidden(el):
+    # el or one of its ancestors within its section is not rendered
+    while el is not None and el.name != "[document]":
+        if "accordion-content" in el.get("class", []):
+            return False
+        if el.has_attr("hidden") or el.get("aria-hidden") == "true":
+            return True
+        if HIDDEN_STYLE.search(el.get("style", "")) or HIDDEN_CLASSES & set(el.get("class", [])):
+            return True
+        el = el.parent
+    return False
+
+
+def _content(item):
+    return item.select_one(".accordion-content")
+
+
+def _children(item):
+    # accordion items nested directly in this item's content (not deeper)
+    content = _content(item)
+    if content is None:
+        return []
+    out = []
+    for acc in content.select(".accordion"):
+        if acc.find_parent(class_="accordion-content") is not content:
+            continue
+        out.extend(acc.find_all("div", recursive=False))
+    return out
+
+
+def _row_cells(tbodys):
+    cells = []
+    for tb in tbodys:
+        if _hidden(tb):
+            continue
+        for tr in tb.find_all("tr"):
+            tds = tr.find_all("td")
+            if not tds:
+                continue
+            texts = []
+            for td in tds[:4]:
+                a = td.find("a")
+                texts.append(_text(a if a is not None else td))
+            cells.append(texts)
+    return cells
+
+
+def parse_snapshot(html, skip_honors=False, include_minors=True):
+    """
+    Course rows from a saved tab 3 page, same fields as
+    StudiegidsScraper.parse_programme_studiegids:
+    course_name, period, ects, code, track, year_label.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    root = soup.select_one(ROOT)
+    out, seen = [], set()
+    if root is None:
+        return out
+
+    def add(tbodys, stack):
+        track_label, year_label = labels_from_stack(stack)
+        for texts in _row_cells(tbodys):
+            row = row_from_cells(texts, track_label, year_label)
+            if not row:
+                continue
+            key = (row["course_name"], row["code"], row["track"], row["year_label"])
+            if key not in seen:
+                seen.add(key)
+                out.append(row)
+
+    def walk(item, stack):
+        title = _section_title(item)
+        if not title or skip_section(title, skip_honors, include_minors):
+            return
+        content = _content(item)
+        if content is not None:
+            add([tb for tb in content.select("table tbody")
+                 if tb.find_parent(class_="accordion-content") is content], stack + [title])
+        for child in _children(item):
+            walk(child, stack + [title])
+
+    top_items = [div for acc in root.select(".accordion") if acc.find_parent(class_="accordion-content") is None
+                 for div in acc.find_all("div", recursive=False)]
+    if not top_items:
+        add(root.select("table tbody"), [])
+        return out
+    for item in top_items:
+        walk(item, [])
+    return out
+
+
+def parse_snapshot_file(path, **kwargs):
+    return parse_snapshot(Path(path).read_text(encoding="utf-8", errors="ignore"), **kwargs)
+
+
+def parse_snapshots(programmes, snapshot_dir, **kwargs):
+    # rows for every programme with a saved page, tagged like the notebook does
+    rows = []
+    for item in programmes:
+        fp = Path(snapshot_dir) / snapshot_name(item["url"])
+        if not fp.exists():
+            continue
+        for r in parse_snapshot_file(fp, **kwargs):
+            r["programme_title"] = item["title"]
+            r["programme_url"] = item["url"]
+            rows.append(r)
+    return rows
@@ -0,0 +1,142 @@
+# runs StudiegidsScraper on a pool of selenium drivers
+# notes: one thread per driver pulling programmes from a shared queue,
+# failed programmes are retried (with a fresh driver), finished ones are
+# appended to a jsonl checkpoint so a crash only loses work in flight
+import json, os, queue, threading, time
+from pathlib import Path
+
+from .studiegids import StudiegidsScraper
+from .studiegids_rows import snapshot_name
+
+
+def headless_chrome():
+    # default driver factory, also what you want in CI against local fixtures
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    opts = Options()
+    opts.add_argument("--headless=new")
+    opts.add_argument("--window-size=1400,1000")
+    return webdriver.Chrome(options=opts)
+
+
+class StudiegidsPool:
+    # driver_factory: zero arg callable returning a new webdriver
+    # n_drivers: browsers running in parallel
+    # retries: extra attempts per programme after a failure
+    # checkpoint: jsonl file, one finished programme per line; programmes
+    #   already in it are skipped on the next run
+    # snapshot_dir: also save each expanded programme page there (see studiegids_offline)
+    def __init__(self, driver_factory=headless_chrome, n_drivers=4, retries=2, checkpoint=None,
+                 scraper_kwargs=None, snapshot_dir=None, debug=False):
+        self.driver_factory = driver_factory
+        self.n_drivers = n_drivers
+        self.retries = retries
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.scraper_kwargs = scraper_kwargs or {}
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.debug = debug
+        self.timings = []  # one dict per programme: title, url, seconds, attempts, rows, error
+        self._results = {}  # url -> finished record of this run
+        self._lock = threading.Lock()
+
+    def _load_checkpoint(self):
+        done = {}
+        if self.checkpoint and self.checkpoint.exists():
+            with open(self.checkpoint, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # half written last line after a crash
+                    done[rec["url"]] = rec
+        return done
+
+    def _save(self, rec):
+        with self._lock:
+            self.timings.append({k: rec[k] for k in ("title", "url", "seconds", "attempts", "error")}
+                                | {"rows": len(rec["rows"])})
+            if rec["error"] is not None:
+                return
+            self._results[rec["url"]] = rec
+            if self.checkpoint:
+                self.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.checkpoint, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _worker(self, jobs, parse_kwargs):
+        driver = None
+        try:
+            while True:
+                try:
+                    item, attempt, spent = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                t0 = time.time()
+                try:
+                    if driver is None:
+                        driver = self.driver_factory()
+                    sg = StudiegidsScraper(driver, **self.scraper_kwargs)
+                    snapshot = self.snapshot_dir / snapshot_name(item["url"]) if self.snapshot_dir else None
+                    rows = sg.parse_programme_studiegids(item["url"], snapshot_path=snapshot, **parse_kwargs)
+                    error = None
+                except Exception as e:
+                    rows, error = [], f"{type(e).__name__}: {e}"
+                    # a broken browser would fail every later programme too, start a new one
+                    try:
+                        if driver is not None:
+                            driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+                spent += time.time() - t0
+
+                if error and attempt < self.retries:
+                    if self.debug:
+                        print(f"retry {attempt + 1} for {item['title']}: {error}")
+                    jobs.put((item, attempt + 1, spent))
+                else:
+                    for r in rows:
+                        r["programme_title"] = item["title"]
+                        r["programme_url"] = item["url"]
+                    self._save({"title": item["title"], "url": item["url"], "rows": rows,
+                                "seconds": round(spent, 2), "attempts": attempt + 1, "error": error})
+                    if self.debug:
+                        print(f"{item['title']}: {len(rows)} rows in {spent:.1f}s" + (f" failed: {error}" if error else ""))
+                jobs.task_done()
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def run(self, programmes, skip_honors=False, include_minors=True):
+        """
+        Scrape every programme ({"title", "url"} dicts, as from list_programmes)
+        on n_drivers browsers. Returns all course rows, including rows loaded
+        from the checkpoint, each tagged with programme_title and programme_url.
+        """
+        programmes = list(programmes)
+        done = self._load_checkpoint()
+        self._results = {}
+        jobs = queue.Queue()
+        for item in programmes:
+            if item["url"] not in done:
+                jobs.put((item, 0, 0.0))
+
+        parse_kwargs = {"skip_honors": skip_honors, "include_minors": include_minors}
+        threads = [threading.Thread(target=self._worker, args=(jobs, parse_kwargs), daemon=True)
+                   for _ in range(min(self.n_drivers, jobs.qsize()))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        rows = []
+        for item in programmes:
+            rec = done.get(item["url"]) or self._results.get(item["url"])
+            if rec:
+                rows.extend(rec["rows"])
+        return rows
@@ -0,0 +1,100 @@
+# label and row helpers for studiegids course tables
+# notes: pure python, no selenium, shared by the live scraper (studiegids.py)
+# and the offline snapshot parser (studiegids_offline.py)
+import hashlib, re
+
+ROOT = "#study-program"
+
+
+def is_minor(txt):
+    return bool(re.search(r"\bminor\b", str(txt or ""), flags=re.I))
+
+
+def year_from(txt):
+    s = str(txt or "")
+    if re.search(r"\bfirst\s*year\b|\byear\s*1\b", s, flags=re.I): return 1
+    if re.search(r"\bsecond\s*year\b|\byear\s*2\b", s, flags=re.I): return 2
+    if re.search(r"\bthird\s*year\b|\byear\s*3\b", s, flags=re.I): return 3
+    return None
+
+
+def track_from(txt):
+    # removes year part and common prefixes
+    s = re.sub(r"\byear\s*\d\b.*", "", str(txt or ""), flags=re.I).strip()
+    s = re.sub(r"^(Track|Specialization)\s+", "", s, flags=re.I).strip()
+    return s
+
+
+def labels_for(top_label, child_label):
+    # prefer year from child, else from top
+    ylab = child_label if year_from(child_label) else (top_label if year_from(top_label) else "")
+    # if top has a year, take track from child, else from top
+    if year_from(top_label):
+        tlab = track_from(child_label)
+    else:
+        tlab = track_from(top_label)
+    return ylab, tlab
+
+
+def labels_from_stack(stack):
+    """derive track label and year label from the labels stack"""
+    year_label = ""
+    for lab in reversed(stack):
+        if re.search(r"\byear\b", str(lab), flags=re.I):
+            year_label = lab
+            break
+    track_label = ""
+    for lab in stack:
+        s = str(lab or "")
+        if re.search(r"\byear\b", s, flags=re.I):
+            continue
+        # strip common prefixes
+        s2 = re.sub(r"^(Track|Specialization|Specialisation)\s+", "", s, flags=re.I).strip()
+        # ignore generic group names when picking a track
+        if re.search(r"\b(compulsory|constrained|choice|elective)\b", s2, flags=re.I):
+            continue
+        track_label = s2 if s2 else track_label
+        if track_label:
+            break
+    return track_label, year_label
+
+
+def skip_section(title, skip_honors=False, include_minors=True):
+    # include minors by default, optionally skip honors
+    if not include_minors and re.search(r"\bminor\b", title, flags=re.I):
+        return True
+    if skip_honors and re.search(r"\bhonours|\bhonors", title, flags=re.I):
+        return True
+    return False
+
+
+def row_from_cells(texts, track_label, year_label):
+    # course dict from [name, period, ects, code] cell texts, None for non rows
+    name = texts[0] if texts else ""
+    if not name:
+        return None
+    per = ects = None
+    if len(texts) > 1:
+        m = re.search(r"(\d+)", texts[1])
+        per = int(m.group(1)) if m else None
+    if len(texts) > 2:
+        m = re.search(r"(\d+)", texts[2])
+        ects = int(m.group(1)) if m else None
+    code = texts[3] if len(texts) > 3 else ""
+    # drop obvious non rows
+    if not code and per is None and ects is None:
+        return None
+    return {
+        "course_name": name,
+        "period": per,
+        "ects": ects,
+        "code": code,
+        "track": track_label or "",
+        "year_label": year_label or ""
+    }
+
+
+def snapshot_name(url):
+    # file name of a programme's saved page, stable per programme url
+    base = url.split("#/tab=")[0].strip().rstrip("/")
+    return hashlib.sha1(base.encode("utf-8")).hexdigest() + ".html"
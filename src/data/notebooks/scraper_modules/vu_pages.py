@@ -1,58 +1,227 @@
 # small static helpers for vu nl pages
-# notes: uses requests cache in a folder that you already set up
-import requests, re
+# notes: one pooled requests session, candidate urls fetched in parallel,
+# disk cache keyed by url hash with etag / last-modified revalidation,
+# parsed pages (soup + link table) kept in a small in-memory lru,
+# the index is written once per fetch / fetch_many batch; use as a context
+# manager or call close() to stop the thread pool
+import hashlib, json, os, threading, time
+import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
+SLUG_MAP = {
+    "curriculum": ["curriculum", "study-programme", "programme", "program"],
+    "future": ["future", "your-future-career", "career"],
+    "admissions": ["admissions", "admission", "how-to-apply", "apply"],
+}
+WANT_WORDS = {
+    "curriculum": ["curriculum", "study programme", "courses"],
+    "future": ["future", "career", "after graduation"],
+    "admissions": ["admissions", "admission", "apply"],
+}
+
+
 class VuPages:
-    def __init__(self, cache_dir: Path):
-        self.cache_dir = cache_dir
+    # max_age: seconds a cached page (or a 404) is served without asking the server
+    # max_workers: parallel requests, also the connection pool size
+    # session: pass your own (e.g. pointed at a local test server) to override the default
+    # parse_cache_size: parsed pages kept in memory (soups are shared, don't modify them)
+    def __init__(self, cache_dir: Path, max_age=24 * 3600, max_workers=8, timeout=25, session=None,
+                 parse_cache_size=64):
+        self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = session or self._make_session(max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # keeps index writes in snapshot order
+        self._index_path = self.cache_dir / "index.json"
+        self._index = self._load_index()
+        self._dirty = False
+        self.parse_cache_size = parse_cache_size
+        self._parsed = OrderedDict()  # url key -> (soup, links)
+        self.parse_hits = self.parse_misses = 0
+
+    @staticmethod
+    def _make_session(pool_size):
+        s = requests.Session()
+        s.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        return s
+
+    # cache index: url hash -> {url, status, etag, last_modified, fetched_at, bytes}
+    def _load_index(self):
+        if self._index_path.exists():
+            try:
+                return json.loads(self._index_path.read_text(encoding="utf-8"))
+            except ValueError:
+                pass
+        return {}
+
+    def flush(self):
+        # write the index if it changed; write then rename so a crash never leaves half an index
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._index, indent=1)
+                self._dirty = False
+            tmp = self._index_path.with_name(f"index.{os.getpid()}.tmp")
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self._index_path)
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.strip().rstrip("/").encode("utf-8")).hexdigest()
 
     def _cache_path(self, url):
-        slug = re.sub(r"[^a-zA-Z0-9]+", "_", url.strip("/"))[:180]
-        return self.cache_dir / f"{slug}.html"
+        return self.cache_dir / f"{self._key(url)}.html"
 
-    def _soup(self, url):
-        fp = self._cache_path(url)
-        if fp.exists():
-            return BeautifulSoup(fp.read_text(encoding="utf-8", errors="ignore"), "lxml")
-        r = requests.get(url, headers=HEADERS, timeout=25)
-        r.raise_for_status()
-        fp.write_text(r.text, encoding="utf-8")
-        return BeautifulSoup(r.text, "lxml")
+    def fetch(self, url):
+        # html text of url; raises requests.HTTPError on 4xx/5xx (cached 404s too)
+        try:
+            return self._fetch(url)
+        finally:
+            self.flush()
 
-    def discover(self, base_url, want):
-        slug_map = {
-            "curriculum": ["curriculum", "study-programme", "programme", "program"],
-            "future": ["future", "your-future-career", "career"],
-            "admissions": ["admissions", "admission", "how-to-apply", "apply"],
-        }
-        for slug in slug_map.get(want, []):
-            url = base_url.rstrip("/") + "/" + slug
+    def _fetch(self, url):
+        # fetch without writing the index, callers flush
+        key, fp = self._key(url), self._cache_path(url)
+        with self._lock:
+            meta = dict(self._index.get(key, {}))
+        fresh = meta and time.time() - meta.get("fetched_at", 0) < self.max_age
+        if fresh and meta.get("status") == 200 and fp.exists():
+            return fp.read_text(encoding="utf-8", errors="ignore")
+        if fresh and meta.get("status") == 404:
+            raise requests.HTTPError(f"404 (cached) for {url}")
+
+        headers = {}
+        if meta.get("status") == 200 and fp.exists():
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        r = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if r.status_code == 304:
+            text = fp.read_text(encoding="utf-8", errors="ignore")
+            meta["fetched_at"] = time.time()
+        elif r.status_code == 404:
+            meta = {"url": url, "status": 404, "fetched_at": time.time()}
+            text = None
+        else:
+            r.raise_for_status()
+            text = r.text
+            tmp = fp.with_name(f"{fp.name}.{threading.get_ident()}.tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, fp)
+            meta = {
+                "url": url,
+                "status": 200,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "bytes": len(text),
+            }
+        with self._lock:
+            self._index[key] = meta
+            self._dirty = True
+        if text is None:
+            raise requests.HTTPError(f"404 for {url}")
+        return text
+
+    def fetch_many(self, urls):
+        # {url: html or None} for all urls, fetched in parallel
+        urls = list(dict.fromkeys(urls))
+        futures = {u: self._pool.submit(self._fetch, u) for u in urls}
+        out = {}
+        for u, f in futures.items():
             try:
-                soup = self._soup(url)
-                if soup:
-                    return url, soup
+                out[u] = f.result()
             except Exception:
-                continue
-        soup = self._soup(base_url)
-        want_words = {
-            "curriculum": ["curriculum", "study programme", "courses"],
-            "future": ["future", "career", "after graduation"],
-            "admissions": ["admissions", "admission", "apply"],
-        }[want]
-        for a in soup.select("a[href]"):
-            txt = a.get_text(" ", strip=True).lower()
-            href = a.get("href", "")
-            if any(w in txt for w in want_words) or any(w in href.lower() for w in want_words):
-                url = href if href.startswith("http") else base_url.rstrip("/") + "/" + href.lstrip("/")
-                try:
-                    soup2 = self._soup(url)
-                    if soup2:
-                        return url, soup2
-                except Exception:
-                    continue
+                out[u] = None
+        self.flush()
+        return out
+
+    def _parsed_page(self, url, html=None):
+        # (soup, links) for url, parsed once; links = [(lowercased text, href), ...]
+        key = self._key(url)
+        with self._lock:
+            if key in self._parsed:
+                self._parsed.move_to_end(key)
+                self.parse_hits += 1
+                return self._parsed[key]
+        soup = BeautifulSoup(html if html is not None else self.fetch(url), "lxml")
+        links = [(a.get_text(" ", strip=True).lower(), a.get("href", "")) for a in soup.select("a[href]")]
+        with self._lock:
+            self.parse_misses += 1
+            self._parsed[key] = (soup, links)
+            while len(self._parsed) > self.parse_cache_size:
+                self._parsed.popitem(last=False)
+        return soup, links
+
+    def _soup(self, url):
+        return self._parsed_page(url)[0]
+
+    def links(self, url):
+        return self._parsed_page(url)[1]
+
+    def _first_ok(self, urls, pages=None):
+        # all candidates in flight at once, first one in priority order that worked wins;
+        # pages: {url: html or None} of a fetch_many batch that already covered urls
+        if pages is None:
+            pages = self.fetch_many(urls)
+        for url in urls:
+            if pages.get(url):
+                return url, self._parsed_page(url, pages[url])[0]
         return None, None
+
+    @staticmethod
+    def _link_candidates(base_url, links, want):
+        want_words = WANT_WORDS[want]
+        return [
+            href if href.startswith("http") else base_url.rstrip("/") + "/" + href.lstrip("/")
+            for txt, href in links
+            if any(w in txt for w in want_words) or any(w in href.lower() for w in want_words)
+        ]
+
+    def discover(self, base_url, want):
+        url, soup = self._first_ok([base_url.rstrip("/") + "/" + slug for slug in SLUG_MAP.get(want, [])])
+        if soup:
+            return url, soup
+        return self._first_ok(self._link_candidates(base_url, self.links(base_url), want))
+
+    def discover_all(self, base_url, wants=("curriculum", "future", "admissions")):
+        # {want: (url, soup)} with every slug candidate fetched in one parallel batch
+        # and the base page parsed and its anchors scanned once
+        slug_urls = {w: [base_url.rstrip("/") + "/" + slug for slug in SLUG_MAP.get(w, [])] for w in wants}
+        pages = self.fetch_many(u for urls in slug_urls.values() for u in urls)
+        found = {w: self._first_ok(slug_urls[w], pages) for w in wants}
+
+        missing = [w for w in wants if found[w][1] is None]
+        if missing:
+            links = self.links(base_url)
+            link_urls = {w: self._link_candidates(base_url, links, w) for w in missing}
+            pages = self.fetch_many(u for urls in link_urls.values() for u in urls)
+            for w in missing:
+                found[w] = self._first_ok(link_urls[w], pages)
+        return found
@@ -0,0 +1,35 @@
+# parse_snapshot on small saved pages, no browser needed
+from scraper_modules.studiegids_offline import parse_snapshot
+
+
+def _row(name, code):
+    return f"<tr><td><a>{name}</a></td><td>Period 1</td><td>6 EC</td><td>{code}</td></tr>"
+
+
+def _section(title, body, collapsed=False):
+    state = ' style="display: none" hidden aria-hidden="true"' if collapsed else ""
+    return (f'<div><button aria-expanded="{str(not collapsed).lower()}">{title}</button>'
+            f'<div class="accordion-content"{state}>{body}</div></div>')
+
+
+def _page(*sections):
+    return f'<html><body><div id="study-program"><div class="accordion">{"".join(sections)}</div></div></body></html>'
+
+
+def test_rows_of_every_top_section():
+    # only the last section opened is still expanded when the page is saved
+    html = _page(
+        _section("Year 1", f"<table><tbody>{_row('Calculus', 'X_1')}</tbody></table>", collapsed=True),
+        _section("Year 2", f"<table><tbody>{_row('Statistics', 'X_2')}</tbody></table>", collapsed=True),
+        _section("Year 3", f"<table><tbody>{_row('Thesis', 'X_3')}</tbody></table>"),
+    )
+    rows = parse_snapshot(html)
+    assert [r["code"] for r in rows] == ["X_1", "X_2", "X_3"]
+    assert [r["year_label"] for r in rows] == ["Year 1", "Year 2", "Year 3"]
+
+
+def test_hidden_tables_inside_a_section_are_skipped():
+    body = (f"<table><tbody>{_row('Calculus', 'X_1')}</tbody></table>"
+            f'<div class="tab" style="display:none"><table><tbody>{_row("Old", "X_9")}</tbody></table></div>')
+    rows = parse_snapshot(_page(_section("Year 1", body, collapsed=True), _section("Year 2", "")))
+    assert [r["code"] for r in rows] == ["X_1"]